@@ -0,0 +1,344 @@
+"""
+In-memory index of the OpenFlights airports.dat file.
+
+Maps city, airport name, IATA and ICAO codes to every matching airport and
+supports prefix, fuzzy and nearest-by-coordinates lookups. The parsed index is
+snapshotted to a pickle next to the data file so later processes skip the CSV
+parse.
+"""
+import bisect
+import csv
+import difflib
+import heapq
+import math
+import os
+import pickle
+import threading
+from collections import namedtuple
+
+AIRPORTS_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "airports.dat")
+SNAPSHOT_VERSION = 1
+EARTH_RADIUS_KM = 6371.0
+# Major airports this close to a city's main airport are served as part of its metro area
+METRO_RADIUS_KM = 40
+
+# The busiest passenger airports, roughly in order of annual traffic. airports.dat
+# carries no size information, so this ranking decides a city's main airport
+# (Heathrow before Luton) and which of several same-named cities is meant
+# (St. Louis, Missouri before Saint-Louis, Senegal).
+MAJOR_AIRPORTS = """
+    ATL DXB DFW LHR HND DEN IST LAX ORD DEL CDG JFK LAS AMS MIA MAD PEK PVG CAN ICN
+    SIN BKK HKG CGK KUL FRA MCO CLT MEX SFO EWR SEA PHX IAH BOS FLL MSP DOH NRT SYD
+    BCN FCO MUC LGW YYZ DTW PHL BOM JED RUH SZX CTU KMG XIY CKG HGH SHA TPE MNL SGN
+    HAN BLR GRU BOG LIM SCL CUN MEL ZRH VIE CPH OSL ARN DUB LIS BRU MXP STN ORY SVO
+    DME LGA DCA IAD BWI MDW SLC SAN TPA BNA AUS PDX STL HNL MSY DAL HOU AUH CAI JNB
+    ADD NBO CPT LOS CMN EZE AEP GIG PTY YVR YUL YYC KIX ITM NGO FUK CTS OKA GMP PKX
+    SAW ATH HEL WAW PRG BUD LED VKO TXL SXF DUS HAM STR CGN MAN EDI BHX GLA LTN LCY
+    GVA NCE LYS MRS TLS VCE NAP LIN BGY PMI AGP ALC VLC SVQ OPO TLV AMM BEY KWI BAH
+    MCT KHI LHE ISB DAC CMB KTM RGN PNH DPS CEB MAA HYD CCU BNE PER AKL ADL CHC OTP
+    SOF BEG ZAG RIX TLL VNO KEF KBP TBS EVN GYD ALA TAS YEG YOW YHZ YWG SJU HAV SDQ
+    PUJ MBJ NAS SJO GUA SAL UIO GYE MVD CNF BSB SSA REC POA CWB VCP CGH RDU PIT CLE
+    CMH IND MCI SAT SMF SJC OAK SNA BUR ONT LGB CVG MKE JAX BDL OGG RSW BHM BHX
+""".split()
+AIRPORT_RANK = {}
+for _rank, _code_value in enumerate(MAJOR_AIRPORTS):
+    AIRPORT_RANK.setdefault(_code_value, _rank)
+UNRANKED = len(MAJOR_AIRPORTS)
+
+Airport = namedtuple("Airport", "id name city country iata icao latitude longitude")
+
+
+def normalize(text):
+    return " ".join((text or "").lower().replace("-", " ").split())
+
+
+def _code(value):
+    value = value.strip()
+    return "" if value == "\\N" else value.upper()
+
+
+def airport_rank(airport):
+    """
+    Position of the airport in MAJOR_AIRPORTS; lower is busier, and airports
+    that are not listed rank after all that are.
+    """
+    return AIRPORT_RANK.get(airport.iata, UNRANKED)
+
+
+def _airport_order(airport):
+    # Busiest first, then international airports; sorts are stable, so file order breaks ties
+    return airport_rank(airport), "international" not in airport.name.lower()
+
+
+def is_commercial(airport):
+    """
+    Airports worth offering for flight searches: they have an IATA code and are not heliports.
+    """
+    return bool(airport.iata) and "heliport" not in airport.name.lower()
+
+
+class AirportIndex:
+    def __init__(self, airports):
+        self.airports = airports
+        self.by_code = {}
+        self.by_city = {}
+        self.by_name = {}
+        self.by_word = {}
+        self._metro = {}
+
+        for i, airport in enumerate(airports):
+            for code in (airport.iata, airport.icao):
+                if code:
+                    self.by_code.setdefault(code, []).append(i)
+            self.by_city.setdefault(normalize(airport.city), []).append(i)
+            self.by_name.setdefault(normalize(airport.name), []).append(i)
+            for word in set(normalize(airport.name).split()):
+                self.by_word.setdefault(word, []).append(i)
+
+        # Sorted (key, kind) pairs for prefix search across cities and names
+        self._sorted_keys = sorted(
+            [(key, "city") for key in self.by_city if key]
+            + [(key, "name") for key in self.by_name if key]
+        )
+        self._key_strings = [key for key, _ in self._sorted_keys]
+
+        self._coordinates = [
+            (i, math.radians(a.latitude), math.radians(a.longitude))
+            for i, a in enumerate(airports)
+            if is_commercial(a)
+        ]
+        self._all_coordinates = [
+            (i, math.radians(a.latitude), math.radians(a.longitude))
+            for i, a in enumerate(airports)
+        ]
+
+    @classmethod
+    def from_dat(cls, path=AIRPORTS_PATH):
+        airports = []
+        with open(path, encoding="utf-8") as f:
+            for row in csv.reader(f):
+                # row format: ID, Name, City, Country, IATA, ICAO, Latitude, Longitude, ...
+                try:
+                    airports.append(Airport(
+                        id=int(row[0]),
+                        name=row[1].strip(),
+                        city=row[2].strip(),
+                        country=row[3].strip(),
+                        iata=_code(row[4]),
+                        icao=_code(row[5]),
+                        latitude=float(row[6]),
+                        longitude=float(row[7]),
+                    ))
+                except (IndexError, ValueError):
+                    continue
+        return cls(airports)
+
+    @classmethod
+    def load(cls, path=AIRPORTS_PATH, snapshot_path=None):
+        """
+        Loads from the pickle snapshot when it is newer than the data file,
+        otherwise parses the CSV and refreshes the snapshot.
+        """
+        snapshot_path = snapshot_path or path + ".pickle"
+        try:
+            if os.path.getmtime(snapshot_path) >= os.path.getmtime(path):
+                with open(snapshot_path, "rb") as f:
+                    version, index = pickle.load(f)
+                if version == SNAPSHOT_VERSION:
+                    return index
+        except (OSError, pickle.UnpicklingError, EOFError, ValueError, AttributeError):
+            pass
+
+        index = cls.from_dat(path)
+        try:
+            with open(snapshot_path, "wb") as f:
+                pickle.dump((SNAPSHOT_VERSION, index), f, protocol=pickle.HIGHEST_PROTOCOL)
+        except OSError as e:
+            print("Could not write airport index snapshot:", e)
+        return index
+
+    def _airports(self, indices):
+        return [self.airports[i] for i in indices]
+
+    def by_iata(self, code):
+        return self._airports(self.by_code.get((code or "").strip().upper(), []))
+
+    def city_airports(self, city):
+        return self._airports(self.by_city.get(normalize(city), []))
+
+    def airports_for_city(self, city, metro_radius_km=METRO_RADIUS_KM):
+        """
+        Commercial airports serving a city, main airport first, including major
+        airports in its metro area: "New York" -> JFK, EWR (which OpenFlights
+        lists under Newark) and LGA. When several countries share the city name,
+        the one with the busiest airport comes first ("London" -> Heathrow, then
+        London, Ontario).
+        """
+        key = normalize(city)
+        cached = self._metro.get(key)
+        if cached is not None:
+            return list(cached)
+        if key not in self.by_city:
+            # Only known city names are memoized, so the cache stays bounded
+            return []
+
+        own = [a for a in self._airports(self.by_city[key]) if is_commercial(a)]
+        by_country = {}
+        for airport in own:
+            by_country.setdefault(airport.country, []).append(airport)
+        groups = sorted(
+            (sorted(group, key=_airport_order) for group in by_country.values()),
+            key=lambda group: (airport_rank(group[0]), -len(group)),
+        )
+
+        results = []
+        if groups:
+            primary = groups[0]
+            results = list(primary)
+            seen = {a.id for a in primary}
+            # The metro area is centred on the main airport, not on every airport
+            # that shares the city name
+            main = primary[0]
+            for airport, _ in self.nearest(main.latitude, main.longitude, k=20, max_km=metro_radius_km):
+                if airport.id not in seen and airport_rank(airport) < UNRANKED:
+                    results.append(airport)
+                    seen.add(airport.id)
+            results.sort(key=_airport_order)
+            for group in groups[1:]:
+                results.extend(group)
+
+        self._metro[key] = tuple(results)
+        return results
+
+    def prefix(self, text, limit=10):
+        """
+        Airports whose city or name starts with text.
+        """
+        key = normalize(text)
+        if not key:
+            return []
+        results = []
+        seen = set()
+        start = bisect.bisect_left(self._key_strings, key)
+        for found, kind in self._sorted_keys[start:]:
+            if not found.startswith(key):
+                break
+            table = self.by_city if kind == "city" else self.by_name
+            for i in table[found]:
+                if i not in seen:
+                    seen.add(i)
+                    results.append(self.airports[i])
+                    if len(results) >= limit:
+                        return results
+        return results
+
+    def fuzzy(self, text, limit=5, cutoff=0.8):
+        """
+        Airports whose city or name is a close spelling match for text.
+        """
+        matches = difflib.get_close_matches(normalize(text), self._key_strings, n=limit, cutoff=cutoff)
+        results = []
+        seen = set()
+        for key in matches:
+            for table in (self.by_city, self.by_name):
+                for i in table.get(key, []):
+                    if i not in seen:
+                        seen.add(i)
+                        results.append(self.airports[i])
+        return results[:limit]
+
+    def keyword(self, text, limit=10):
+        """
+        Airports whose name contains every word of text ("heathrow" -> LHR).
+        """
+        words = normalize(text).split()
+        if not words:
+            return []
+        matches = None
+        for word in words:
+            found = set(self.by_word.get(word, ()))
+            matches = found if matches is None else matches & found
+            if not matches:
+                return []
+        return [self.airports[i] for i in sorted(matches)][:limit]
+
+    def search(self, text, limit=10):
+        """
+        Best-effort resolution of free text: code, then city, then name, then
+        name keywords, then prefix, then fuzzy match.
+        """
+        text = (text or "").strip()
+        if not text:
+            return []
+        # "Lima" and "Kobe" are also ICAO codes; a known city name wins unless
+        # the text is written as a code
+        is_city = normalize(text) in self.by_city
+        if len(text) in (3, 4) and text.isalpha() and (text.isupper() or not is_city):
+            by_code = self.by_iata(text)
+            if by_code:
+                return by_code[:limit]
+        for lookup in (
+            self.airports_for_city,
+            lambda t: self._airports(self.by_name.get(normalize(t), [])),
+            lambda t: self.keyword(t, limit),
+            lambda t: self.prefix(t, limit),
+            lambda t: self.fuzzy(t, limit),
+        ):
+            found = lookup(text)
+            if found:
+                return found[:limit]
+        return []
+
+    def nearest(self, latitude, longitude, k=5, max_km=None, commercial_only=True):
+        """
+        Returns up to k (airport, distance_km) pairs closest to the coordinates.
+        """
+        lat = math.radians(latitude)
+        lon = math.radians(longitude)
+        cos_lat = math.cos(lat)
+        candidates = self._coordinates if commercial_only else self._all_coordinates
+
+        def distance(entry):
+            _, other_lat, other_lon = entry
+            a = (
+                math.sin((other_lat - lat) / 2) ** 2
+                + cos_lat * math.cos(other_lat) * math.sin((other_lon - lon) / 2) ** 2
+            )
+            return 2 * EARTH_RADIUS_KM * math.asin(min(1.0, math.sqrt(a)))
+
+        if max_km is not None:
+            # Cheap latitude band check before the full haversine
+            band = max_km / EARTH_RADIUS_KM
+            candidates = [c for c in candidates if abs(c[1] - lat) <= band]
+
+        scored = ((distance(entry), entry[0]) for entry in candidates)
+        results = []
+        for km, i in heapq.nsmallest(k, scored):
+            if max_km is not None and km > max_km:
+                break
+            results.append((self.airports[i], km))
+        return results
+
+
+_index = None
+_index_lock = threading.Lock()
+
+
+def get_index():
+    """
+    Returns the process-wide airport index, loading it on first use.
+    """
+    global _index
+    if _index is None:
+        with _index_lock:
+            if _index is None:
+                _index = AirportIndex.load()
+    return _index
+
+
+def get_airport_code(city_name):
+    """
+    Primary IATA code for a city or airport name, or None if it cannot be resolved.
+    """
+    matches = [a for a in get_index().search(city_name) if a.iata]
+    return matches[0].iata if matches else None
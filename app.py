@@ -1,41 +1,119 @@
-from flask import Flask, request, jsonify, render_template
+from flask import Flask, request, jsonify, render_template, Response, stream_with_context
 from flask_cors import CORS
-from httpcore import TimeoutException
-import psycopg2
 import os
-from urllib.parse import urlparse
-import subprocess
-import re
-import requests
-from bs4 import BeautifulSoup
-from sentence_transformers import SentenceTransformer
-import chromadb
-from selenium import webdriver
-from selenium.webdriver.chrome.service import Service
-from selenium.webdriver.chrome.options import Options
+from selenium.common.exceptions import WebDriverException, TimeoutException
 from selenium.webdriver.common.by import By
-from selenium.webdriver.support.ui import WebDriverWait
-from selenium.webdriver.support import expected_conditions as EC
-from webdriver_manager.chrome import ChromeDriverManager
 import time
 import html
 from datetime import datetime, timedelta
-import csv
+import json
+from concurrent.futures import ThreadPoolExecutor, wait
+from concurrent.futures import TimeoutError as FuturesTimeout
+from contextlib import contextmanager, ExitStack
+
+from driverPool import DriverPool
+from resources import registry, WARM_UP
+from tripStore import insert_trip, bulk_insert_trips, iter_ndjson, open_trip_store
+from pageWait import wait_for_any, readiness_stats
+from resultCache import ResultCache, make_key
+from llmClient import get_client, LLMError
+from ingest import hotel_to_text, flight_to_text
+from jobQueue import JobQueue, QueueFull, FAILED
+from airportIndex import get_airport_code
+from fixtureStore import replay_enabled, get_store, ReplayDriverPool
+from hotelFetch import fetch_hotels_static, parse_property_cards, search_url
+import tracing
+from tracing import stage
 
 # Initialize Flask
 app = Flask(__name__)
 CORS(app)
-trips = []
 
-# Configure database connection
-DATABASE_URL = os.getenv("DATABASE_URL", "postgresql://localhost")
-url = urlparse(DATABASE_URL)
-conn = psycopg2.connect("postgresql://localhost")
+# Heavy resources are created on first use; WARM_UP preloads them in the background
+CHROME_POOL_SIZE = int(os.getenv("CHROME_POOL_SIZE", "3"))
+CHROME_PAGE_LOAD_TIMEOUT = float(os.getenv("CHROME_PAGE_LOAD_TIMEOUT", "30"))
+
+
+def open_driver_pool():
+    """
+    Shared pool of headless Chrome sessions used by the scrapers.
+    """
+    if replay_enabled():
+        return ReplayDriverPool(get_store(), max_size=CHROME_POOL_SIZE)
+    return DriverPool(
+        max_size=CHROME_POOL_SIZE,
+        max_uses=int(os.getenv("CHROME_MAX_USES", "50")),
+        page_load_timeout=CHROME_PAGE_LOAD_TIMEOUT,
+    )
+
 
-# Initialize embedding model and Chroma
-embedder = SentenceTransformer("all-MiniLM-L6-v2")
-chroma_client = chromadb.PersistentClient(path="./chromadb_persist")
-collection = chroma_client.get_or_create_collection(name="travel_data")
+registry.register("driver_pool", open_driver_pool, close=lambda pool: pool.close())
+
+# Durable trip storage shared by all workers
+registry.register("trip_store", lambda: open_trip_store(lambda: registry.get("db_pool")))
+if WARM_UP:
+    registry.warm_up(WARM_UP, background=True)
+
+# Expired listings and cached answers are evicted by `python ingest.py`, run
+# from a single process rather than from every worker
+
+
+@contextmanager
+def browser_session(source, deadline=None):
+    """
+    A pooled browser. Waiting for one is timed as its own "browser_wait" stage so
+    it does not count towards the fetch. With a deadline, both the wait and page
+    loads in the session are limited to the time left; callers should still
+    check the deadline once the browser is theirs.
+    """
+    timeout = None if deadline is None else max(0, deadline - time.time())
+    with ExitStack() as stack:
+        with stage("browser_wait", source=source):
+            driver = stack.enter_context(registry.get("driver_pool").session(timeout))
+        if deadline is not None:
+            # Selenium needs a positive timeout; the pool restores its default on release
+            driver.set_page_load_timeout(max(1, min(CHROME_PAGE_LOAD_TIMEOUT, deadline - time.time())))
+        yield driver
+
+
+# Hotel detail pages are fetched in parallel, one worker per pooled browser
+detail_executor = ThreadPoolExecutor(max_workers=CHROME_POOL_SIZE)
+SCRAPE_DEADLINE_SECONDS = float(os.getenv("SCRAPE_DEADLINE_SECONDS", "45"))
+
+# Scraped results are shared between requests for the same destination and dates.
+# Partial scrapes (prices still pending) are not cached.
+hotel_cache = ResultCache(
+    ttl=float(os.getenv("HOTEL_CACHE_TTL", "900")),
+    stale_ttl=float(os.getenv("HOTEL_CACHE_STALE_TTL", "3600")),
+    max_entries=int(os.getenv("HOTEL_CACHE_SIZE", "256")),
+    should_cache=lambda hotels: bool(hotels) and all(
+        h["price_per_night"] != "pending" for h in hotels
+    ),
+    name="hotels",
+)
+
+flight_cache = ResultCache(
+    ttl=float(os.getenv("FLIGHT_CACHE_TTL", "600")),
+    stale_ttl=float(os.getenv("FLIGHT_CACHE_STALE_TTL", "1800")),
+    max_entries=int(os.getenv("FLIGHT_CACHE_SIZE", "256")),
+    should_cache=bool,
+    name="flights",
+)
+
+# Hotel and flight retrieval for one recommendation run side by side
+source_executor = ThreadPoolExecutor(max_workers=2 * int(os.getenv("JOB_WORKERS", "4")))
+HOTEL_SOURCE_TIMEOUT = float(os.getenv("HOTEL_SOURCE_TIMEOUT", "60"))
+FLIGHT_SOURCE_TIMEOUT = float(os.getenv("FLIGHT_SOURCE_TIMEOUT", "45"))
+DEFAULT_ORIGIN = os.getenv("DEFAULT_ORIGIN", "New York")
+
+# Scrapes and LLM calls run here instead of inside the request thread
+job_queue = JobQueue(
+    max_workers=int(os.getenv("JOB_WORKERS", "4")),
+    history_ttl=float(os.getenv("JOB_HISTORY_TTL", "900")),
+    max_pending=int(os.getenv("JOB_MAX_PENDING", "32")),
+)
+# How often a streaming response reports progress while its scrape job runs
+STREAM_STATUS_INTERVAL = 2.0
 
 HEADERS = {
     "User-Agent": (
@@ -44,6 +122,26 @@ HEADERS = {
     )
 }
 
+SEARCH_READY_SELECTORS = [
+    "div[data-testid='property-card']",
+]
+SEARCH_READY_TIMEOUT = 15
+
+FLIGHT_READY_SELECTORS = [
+    "div.resultsContainer",
+    "div.resultWrapper",
+]
+FLIGHT_READY_TIMEOUT = 30
+
+PRICE_SELECTORS = [
+    "span[data-testid='price-and-discounted-price']",
+    "span[data-testid='price']",
+    "div[data-testid='price-and-discounted-price']",
+    "div[data-testid='price']",
+    "span[class*='bui-price-display__value']",
+    "div[class*='bui-price-display__value']",
+]
+
 @app.route("/")
 def index():
     return render_template("index.html")
@@ -59,20 +157,33 @@ def submit_trip():
     budget = data.get("budget")
 
     try:
-        cur = conn.cursor()
-        cur.execute(
-            """
-            INSERT INTO trip_requests (name, destination, start_date, end_date, budget)
-            VALUES (%s, %s, %s, %s, %s)
-            """,
-            (name, destination, start_date, end_date, budget),
-        )
-        conn.commit()
-        cur.close()
+        insert_trip(registry.get("db_pool"), name, destination, start_date, end_date, budget)
         return jsonify({"success": True})
     except Exception as e:
         return jsonify({"success": False, "error": str(e)})
-    
+
+
+@app.route("/api/trip/submit/bulk", methods=["POST"])
+def submit_trips_bulk():
+    """
+    Accepts a JSON array of trips, or NDJSON (one trip per line) which is read
+    from the request stream as it arrives. Rows are written in batched
+    transactions and invalid rows are reported individually.
+    """
+    if request.mimetype in ("application/x-ndjson", "application/jsonl", "text/plain"):
+        rows = iter_ndjson(request.stream)
+    else:
+        data = request.get_json(silent=True)
+        if not isinstance(data, list):
+            return jsonify({"success": False, "error": "Expected a JSON array or NDJSON body"}), 400
+        rows = data
+
+    try:
+        result = bulk_insert_trips(registry.get("db_pool"), rows)
+    except Exception as e:
+        return jsonify({"success": False, "error": str(e)}), 500
+    return jsonify(result.to_dict())
+
 
 @app.route("/api/trip", methods=["POST"])
 def save_trip():
@@ -92,10 +203,24 @@ def save_trip():
         "end_date": data.get("end_date"),
         "budget": data.get("budget"),
     }
-    trips.append(trip)
+    try:
+        registry.get("trip_store").save(trip)
+    except Exception as e:
+        # Still answer the search; the trip record is best effort
+        print("⚠️ Error saving trip:", e)
+
+    start_date, end_date = trip["start_date"], trip["end_date"]
+
+    def run(job):
+        job.set_progress("scraping hotels")
+        hotels = get_hotels(destination, start_date, end_date)
+        return {"success": True, "response": render_hotels_html(hotels)}
 
-    hotels = scrape_hotels(destination, trip["start_date"], trip["end_date"])
+    job = job_queue.submit("trip", make_key(destination, start_date, end_date), run)
+    return job_accepted(job)
 
+
+def render_hotels_html(hotels):
     response_html = "<h4>Top Hotels:</h4><ul>"
     if hotels:
         for h in hotels:
@@ -112,277 +237,422 @@ def save_trip():
     else:
         response_html += "<li>No hotels found.</li>"
     response_html += "</ul>"
-
-    return jsonify({"success": True, "response": response_html})
+    return response_html
 
 
 @app.route("/api/recommendations", methods=["POST"])
 def get_recommendations():
-    data = request.get_json()
+    data = request.get_json(silent=True)
+    if not isinstance(data, dict):
+        return jsonify({"success": False, "error": "Expected a JSON object"}), 400
     destination = data.get("destination")
-    hotels = scrape_hotels(destination)
-    print("SCRAPED HOTELS:", hotels)
+    if not destination:
+        return jsonify({"success": False, "error": "Destination required"}), 400
+    origin = data.get("origin") or DEFAULT_ORIGIN
+    start_date = data.get("start_date")
+    end_date = data.get("end_date")
 
-    flights = scrape_flights("New York", destination)
-    print("SCRAPED FLIGHTS:", flights)
+    def run(job):
+        job.set_progress("scraping hotels and flights")
+        prompt, sources = build_recommendation_prompt(destination, origin, start_date, end_date)
+        if prompt is None:
+            return {"response": NO_RESULTS_MESSAGE, "sources": sources}
 
-    docs = []
+        job.set_progress("generating recommendations")
+        summary = call_ollama_cli(prompt)
+        return {"response": summary, "sources": sources}
 
-    for hotel in hotels:
-        docs.append(
-            f"Hotel {hotel['name']} in {hotel['location']} costs {hotel['price_per_night']} "
-            f"per night with rating {hotel['rating']}."
-        )
+    job = job_queue.submit("recommendations", recommendation_key(destination, origin, start_date, end_date), run)
+    return job_accepted(job)
 
-    if flights:
-        for flight in flights:
-            docs.append(
-                f"Flight by {flight['airline']} from {flight['route']} on {flight['date']} "
-                f"departing at {flight['time']} priced at {flight['price']}."
-            )
 
-    if not docs:
-        return jsonify({"response": "No hotels or flights were found. Please try again with a different destination."})
+def recommendation_key(destination, origin, start_date, end_date):
+    return make_key(destination, start_date, end_date, " ".join(origin.lower().split()))
+
+
+def job_accepted(job):
+    return jsonify({
+        "success": True,
+        "job_id": job.id,
+        "status": job.status,
+        "status_url": f"/api/jobs/{job.id}",
+    }), 202
+
+
+@app.errorhandler(QueueFull)
+def job_queue_full(e):
+    return jsonify({"success": False, "error": "Too many searches in progress, try again shortly"}), 503, {
+        "Retry-After": "30"
+    }
+
+
+@app.route("/api/jobs/<job_id>", methods=["GET"])
+def get_job(job_id):
+    job = job_queue.get(job_id)
+    if job is None:
+        return jsonify({"success": False, "error": "Unknown job"}), 404
+    return jsonify(job.to_dict())
+
+
+@app.route("/api/recommendations/stream", methods=["POST"])
+def stream_recommendations():
+    """
+    Same as /api/recommendations, but forwards the answer as server-sent events
+    while llama3 generates it. A "status" event goes out straight away; the
+    scrape runs on the job queue, so identical requests share it.
+    """
+    data = request.get_json(silent=True)
+    if not isinstance(data, dict):
+        return jsonify({"success": False, "error": "Expected a JSON object"}), 400
+    destination = data.get("destination")
+    if not destination:
+        return jsonify({"success": False, "error": "Destination required"}), 400
+    origin = data.get("origin") or DEFAULT_ORIGIN
+    start_date = data.get("start_date")
+    end_date = data.get("end_date")
+
+    def run(job):
+        job.set_progress("scraping hotels and flights")
+        return build_recommendation_prompt(destination, origin, start_date, end_date)
 
-    prompt = (
-        f"Based on the following travel options to {destination}, suggest the best hotels"
-        + (" and flights" if flights else "")
-        + ":\n\n"
-        + "\n".join(docs)
-        + "\n\nAnswer:"
+    started = time.time()
+    job = job_queue.submit("recommendation_prompt", recommendation_key(destination, origin, start_date, end_date), run)
+
+    def events():
+        yield sse_event({"status": job.progress, "job_id": job.id}, event="status")
+
+        progress = job.progress
+        while not job.wait(STREAM_STATUS_INTERVAL):
+            if job.progress != progress:
+                progress = job.progress
+                yield sse_event({"status": progress}, event="status")
+            else:
+                # Comment line, keeps proxies from closing an idle stream
+                yield ": waiting\n\n"
+        if job.status == FAILED:
+            yield sse_event({"error": "Failed to gather travel options."}, event="error")
+            return
+
+        prompt, sources = job.result
+        if prompt is None:
+            yield sse_event({"token": NO_RESULTS_MESSAGE})
+            yield sse_event({"sources": sources}, event="done")
+            return
+
+        yield sse_event({"status": "generating recommendations"}, event="status")
+        generation_started = time.time()
+        first_token_seconds = None
+        try:
+            for token in get_client().stream(prompt):
+                if first_token_seconds is None:
+                    first_token_seconds = time.time() - generation_started
+                yield sse_event({"token": token})
+        except LLMError as e:
+            print("Error calling Ollama:", e)
+            yield sse_event({"error": "Failed to get LLM response."}, event="error")
+            return
+        yield sse_event({
+            "time_to_first_token_seconds": first_token_seconds,
+            "scrape_seconds": generation_started - started,
+            "total_seconds": time.time() - started,
+            "sources": sources,
+        }, event="done")
+
+    return Response(
+        stream_with_context(events()),
+        mimetype="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
     )
-    summary = call_ollama_cli(prompt)
 
-    return jsonify({"response": summary})
 
-def scrape_hotels(destination, start_date=None, end_date=None):
-    search_url = f"https://www.booking.com/searchresults.html?ss={destination}"
+def sse_event(payload, event=None):
+    message = f"data: {json.dumps(payload)}\n\n"
+    if event:
+        message = f"event: {event}\n" + message
+    return message
+
+
+NO_RESULTS_MESSAGE = "No hotels or flights were found. Please try again with a different destination."
+
+
+def build_recommendation_prompt(destination, origin=DEFAULT_ORIGIN, start_date=None, end_date=None):
+    """
+    Fetches options for the destination and builds the llama3 prompt. Returns
+    (prompt, sources); prompt is None when nothing was found.
+    """
+    hotels, flights, sources = gather_travel_options(destination, origin, start_date, end_date)
+    print("SCRAPED HOTELS:", hotels)
+    print("SCRAPED FLIGHTS:", flights)
 
-    options = Options()
-    options.add_argument("--headless")
-    options.add_argument("--disable-gpu")
-    options.add_argument("--no-sandbox")
-    options.add_argument("--window-size=1920,1080")
-    options.add_argument(
-        "user-agent=Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/122.0.0.0 Safari/537.36"
+    with stage("prompt") as span:
+        docs = [hotel_to_text(hotel) for hotel in hotels]
+        if flights:
+            docs.extend(flight_to_text(flight) for flight in flights)
+
+        if not docs:
+            return None, sources
+
+        prompt = (
+            f"Based on the following travel options to {destination}, suggest the best hotels"
+            + (" and flights" if flights else "")
+            + ":\n\n"
+            + "\n".join(docs)
+            + "\n\nAnswer:"
+        )
+        span.add("docs", len(docs))
+        span.add("prompt_chars", len(prompt))
+    return prompt, sources
+
+
+def loaded_stats(name, describe):
+    """
+    Stats for a resource that has already been created; stats never trigger a load.
+    """
+    return describe(registry.get(name)) if registry.loaded(name) else None
+
+
+@app.route("/api/stats", methods=["GET"])
+def get_stats():
+    return jsonify({
+        "resources": registry.stats(),
+        "driver_pool": loaded_stats("driver_pool", lambda pool: pool.stats()),
+        "trip_store": loaded_stats("trip_store", lambda store: store.backend),
+        "db_pool": loaded_stats("db_pool", lambda pool: pool.stats()),
+        "embeddings": loaded_stats("embedder", lambda embedder: embedder.stats()),
+        "page_readiness": readiness_stats.snapshot(),
+        "hotel_cache": hotel_cache.stats(),
+        "flight_cache": flight_cache.stats(),
+        "llm": get_client().stats(),
+        "jobs": job_queue.stats(),
+    })
+
+
+@app.route("/metrics", methods=["GET"])
+def metrics():
+    """
+    Per-stage latency histograms and counters in Prometheus text format.
+    """
+    if not tracing.ENABLED:
+        return Response("Tracing is disabled (TRACING=0)\n", status=404, mimetype="text/plain")
+    return Response(tracing.render_prometheus(), mimetype="text/plain; version=0.0.4")
+
+
+def get_hotels(destination, start_date=None, end_date=None):
+    return hotel_cache.get_or_load(
+        make_key(destination, start_date, end_date),
+        lambda: scrape_hotels(destination, start_date, end_date),
     )
 
-    driver = webdriver.Chrome(service=Service(ChromeDriverManager().install()), options=options)
-    driver.get(search_url)
-    time.sleep(5)
-    soup = BeautifulSoup(driver.page_source, "html.parser")
-
-    hotels = []
-    cards = soup.select("div[data-testid='property-card']")
-    print(f"Found {len(cards)} hotel cards")
-
-    for card in cards[:5]:
-        name_tag = card.select_one("div[data-testid='title']")
-        name = name_tag.get_text(strip=True) if name_tag else "N/A"
-
-        location_tag = card.select_one("span[data-testid='address']")
-        location = location_tag.get_text(strip=True) if location_tag else destination
-
-        # Rating
-        rating = "N/A"
-        rating_container = card.select_one("div[data-testid='review-score']")
-        if rating_container:
-            score_div = rating_container.select_one("div:nth-child(1)")
-            desc_div = rating_container.select_one("div:nth-child(2)")
-            score = score_div.get_text(strip=True) if score_div else ""
-            desc = desc_div.get_text(strip=True) if desc_div else ""
-            rating = " / ".join(filter(None, [score, desc]))
-
-        # URL with dates
-        link_tag = card.select_one("a[data-testid='title-link']")
-        if link_tag:
-            raw_href = link_tag.get("href", "")
-            if raw_href.startswith("http"):
-                base_url = raw_href.split("?")[0]
-            else:
-                base_url = "https://www.booking.com" + raw_href.split("?")[0]
-            if start_date and end_date:
-                url_with_dates = f"{base_url}?checkin={start_date}&checkout={end_date}"
-            else:
-                url_with_dates = base_url
-        else:
-            url_with_dates = ""
 
-        # Load detail page to get price
-        price = "N/A"
-        if url_with_dates:
+def scrape_hotels(destination, start_date=None, end_date=None, deadline_seconds=None):
+    if deadline_seconds is None:
+        deadline_seconds = SCRAPE_DEADLINE_SECONDS
+    deadline = time.time() + deadline_seconds
+
+    # Try the plain HTTP fetch first and only start a browser when it has no cards
+    hotels = fetch_hotels_static(destination, start_date, end_date)
+    if hotels:
+        print(f"Found {len(hotels)} hotel cards without a browser")
+    else:
+        with browser_session("booking_browser", deadline) as driver, \
+                stage("fetch", source="booking_browser") as span:
             try:
-                detail_driver = webdriver.Chrome(service=Service(ChromeDriverManager().install()), options=options)
-                detail_driver.get(url_with_dates)
-
-                # Wait up to 15 seconds for any price element to appear
-                wait = WebDriverWait(detail_driver, 15)
-                possible_price_selectors = [
-                    (By.CSS_SELECTOR, "span[data-testid='price-and-discounted-price']"),
-                    (By.CSS_SELECTOR, "span[data-testid='price']"),
-                    (By.CSS_SELECTOR, "div[data-testid='price-and-discounted-price']"),
-                    (By.CSS_SELECTOR, "div[data-testid='price']"),
-                    (By.CSS_SELECTOR, "span[class*='bui-price-display__value']"),
-                    (By.CSS_SELECTOR, "div[class*='bui-price-display__value']"),
-                ]
-
-                found_price = False
-                for selector in possible_price_selectors:
-                    try:
-                        element = wait.until(EC.presence_of_element_located(selector))
-                        price_text = element.text.strip()
-                        if price_text:
-                            price = price_text
-                            found_price = True
-                            break
-                    except:
-                        continue  # Try next selector
-
-                detail_driver.quit()
-
-            except Exception as e:
-                print("Error loading detail page:", e)
-
-        hotels.append({
-            "type": "hotel",
-            "name": name,
-            "url": url_with_dates,
-            "location": location,
-            "price_per_night": price,
-            "rating": rating
-        })
-
-    driver.quit()
+                driver.get(search_url(destination))
+            except TimeoutException:
+                # Parse whatever arrived before the deadline
+                print("⚠️ Search page did not finish loading in time")
+            wait_for_any(
+                driver,
+                SEARCH_READY_SELECTORS,
+                timeout=min(SEARCH_READY_TIMEOUT, max(0, deadline - time.time())),
+                page="booking_search",
+            )
+            page_source = driver.page_source
+            span.add("page_chars", len(page_source))
+
+        hotels = parse_property_cards(page_source, destination, start_date, end_date)
+        print(f"Found {len(hotels)} hotel cards")
+
+    # Cards rarely carry a price without dates; look those up on the detail pages
+    missing = [h for h in hotels if h["price_per_night"] == "N/A"]
+    fill_detail_prices(missing, deadline)
     return hotels
 
 
+def fill_detail_prices(hotels, deadline):
+    """
+    Loads every hotel's detail page in parallel and fills in price_per_night.
+    Pages that have not finished by the deadline are reported as "pending".
+    """
+    futures = {
+        detail_executor.submit(fetch_detail_price, hotel["url"], deadline): hotel
+        for hotel in hotels
+        if hotel["url"]
+    }
+    if not futures:
+        return
+
+    done, not_done = wait(futures, timeout=max(0, deadline - time.time()))
+    for future in done:
+        futures[future]["price_per_night"] = future.result()
+    for future in not_done:
+        # Queued fetches are dropped so they do not hold a browser after we return
+        future.cancel()
+        futures[future]["price_per_night"] = "pending"
+    if not_done:
+        print(f"Detail price deadline reached with {len(not_done)} pages pending")
+
+
+def fetch_detail_price(url, deadline):
+    if time.time() >= deadline:
+        return "pending"
+
+    price = "N/A"
+    try:
+        with browser_session("booking_detail", deadline) as detail_driver, \
+                stage("fetch", source="booking_detail"):
+            # The deadline may have passed while waiting for a browser
+            if time.time() >= deadline:
+                return "pending"
+            try:
+                detail_driver.get(url)
+            except TimeoutException:
+                return "pending"
+
+            # Wait up to 15 seconds for the first price element to appear
+            element = wait_for_any(
+                detail_driver,
+                PRICE_SELECTORS,
+                timeout=max(0, min(15, deadline - time.time())),
+                page="booking_detail",
+                require_text=True,
+            )
+            if element is not None:
+                price = element.text.strip()
+
+    except TimeoutError:
+        # No browser came free before the deadline
+        return "pending"
+    except Exception as e:
+        print("Error loading detail page:", e)
+
+    return price
+
+
+def scrape_flights(origin_city, destination_city, start_date_str=None):
+    origin_code = get_airport_code(origin_city)
+    destination_code = get_airport_code(destination_city)
+
+    if not origin_code or not destination_code:
+        print(f"Airport code not found for {origin_city} or {destination_city}")
+        return []
+
+    if not start_date_str:
+        start_date_str = (datetime.now() + timedelta(days=14)).strftime("%Y-%m-%d")
+
+    url = f"https://www.kayak.com/flights/{origin_code}-{destination_code}/{start_date_str}"
+
+    with browser_session("kayak_browser") as driver:
+        with stage("fetch", source="kayak_browser"):
+            driver.get(url)
+
+            # Handle cookie popup
+            close_button = wait_for_any(
+                driver, ["button[aria-label='Close']"], timeout=3, page="kayak_cookie_popup"
+            )
+            if close_button is not None:
+                try:
+                    close_button.click()
+                    print("✅ Cookie popup dismissed")
+                except WebDriverException:
+                    pass
+            else:
+                print("⚠️ No cookie popup found")
+
+            # Wait for flight results container
+            if wait_for_any(driver, FLIGHT_READY_SELECTORS, timeout=FLIGHT_READY_TIMEOUT, page="kayak_search") is None:
+                print("❌ Flight results did not load in time")
+                return []
+            print("✅ Flight results loaded")
+
+        with stage("parse", source="kayak") as span:
+            flights = []
+            flight_cards = driver.find_elements(By.CSS_SELECTOR, 'div.resultWrapper')[:5]
+
+            for card in flight_cards:
+                flights.append({
+                    "type": "flight",
+                    "airline": card_text(card, 'div.airlineName, span.codeshares-airline-names'),
+                    "route": f"{origin_code} to {destination_code}",
+                    "date": start_date_str,
+                    "price": card_text(card, 'span.price-text'),
+                    "time": card_text(card, 'div.section-times'),
+                    "duration": card_text(card, 'div.duration'),
+                    "layovers": card_text(card, 'div.stops-text'),
+                })
+            span.add("cards", len(flights))
+
+            return flights
+
+
+def card_text(card, selector):
+    try:
+        return card.find_element(By.CSS_SELECTOR, selector).text.strip()
+    except WebDriverException:
+        return "N/A"
+
+
+def get_flights(origin, destination, start_date=None):
+    return flight_cache.get_or_load(
+        make_key(destination, start_date, None, " ".join((origin or "").lower().split())),
+        lambda: scrape_flights(origin, destination, start_date),
+    )
+
+
+def gather_travel_options(destination, origin, start_date=None, end_date=None):
+    """
+    Fetches hotels and flights concurrently, each under its own timeout, and
+    returns whatever finished along with per-source latency.
+    """
+    started = time.time()
+    sources = {
+        "hotels": (source_executor.submit(timed, get_hotels, destination, start_date, end_date),
+                   HOTEL_SOURCE_TIMEOUT),
+        "flights": (source_executor.submit(timed, get_flights, origin, destination, start_date),
+                    FLIGHT_SOURCE_TIMEOUT),
+    }
+
+    results = {}
+    report = {}
+    for name, (future, timeout) in sources.items():
+        try:
+            value, seconds = future.result(timeout=max(0, started + timeout - time.time()))
+            results[name] = value or []
+            report[name] = {"status": "ok", "seconds": round(seconds, 3), "count": len(results[name])}
+        except FuturesTimeout:
+            results[name] = []
+            report[name] = {"status": "timeout", "seconds": timeout, "count": 0}
+        except Exception as e:
+            print(f"Error fetching {name}:", e)
+            results[name] = []
+            report[name] = {"status": "error", "seconds": round(time.time() - started, 3), "count": 0}
+
+    return results["hotels"], results["flights"], report
+
+
+def timed(fn, *args):
+    started = time.time()
+    value = fn(*args)
+    return value, time.time() - started
+
+
 def call_ollama_cli(prompt):
     try:
-        result = subprocess.run(
-            ["ollama", "run", "llama3"],
-            input=prompt,
-            capture_output=True,
-            text=True,
-            check=True,
-        )
-        return result.stdout.strip()
-    except subprocess.CalledProcessError as e:
+        return get_client().generate(prompt)
+    except LLMError as e:
+        print("Error calling Ollama:", e)
         return "Failed to get LLM response."
 
 
 if __name__ == "__main__":
     app.run(host="127.0.0.1", port=5001, debug=True)
-
-
-# def scrape_flights(origin_city, destination_city, start_date_str):
-#     origin_code = get_airport_code(origin_city)
-#     destination_code = get_airport_code(destination_city)
-
-#     if not origin_code or not destination_code:
-#         print(f"Airport code not found for {origin_city} or {destination_city}")
-#         return []
-
-#     url = f"https://www.kayak.com/flights/{origin_code}-{destination_code}/{start_date_str}"
-
-#     options = Options()
-#     options.add_argument("--headless=new")
-#     options.add_argument("--disable-gpu")
-#     options.add_argument("--no-sandbox")
-#     options.add_argument("--disable-dev-shm-usage")
-#     options.add_argument("--window-size=1920,1080")
-#     options.add_argument("--start-maximized")
-#     options.add_argument("--user-agent=Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/115.0.0.0 Safari/537.36")
-#     driver = webdriver.Chrome(options=options)
-
-#     try:
-#         driver.get(url)
-#         with open("kayak_debug.html", "w", encoding="utf-8") as f:
-#             f.write(driver.page_source)
-
-#         # Save screenshot
-#         driver.save_screenshot("kayak_debug.png")
-#         wait = WebDriverWait(driver, 60)
-
-
-#         # Handle cookie popup
-#         try:
-#             wait.until(
-#                 EC.element_to_be_clickable(
-#                     (By.CSS_SELECTOR, "button[aria-label='Close']")
-#                 )
-#             ).click()
-#             print("✅ Cookie popup dismissed")
-#         except TimeoutException:
-#             print("⚠️ No cookie popup found")
-
-
-#         # Wait for flight results container
-#         wait.until(
-#             EC.presence_of_element_located((By.CSS_SELECTOR, 'div.resultsContainer'))
-#         )
-#         print("✅ Flight results loaded")
-
-#         flights = []
-#         flight_cards = driver.find_elements(By.CSS_SELECTOR, 'div.resultWrapper')[:5]
-
-#         for card in flight_cards:
-#             try:
-#                 airline = card.find_element(By.CSS_SELECTOR, 'div.airlineName, span.codeshares-airline-names').text.strip()
-#             except:
-#                 airline = "N/A"
-
-#             try:
-#                 time = card.find_element(By.CSS_SELECTOR, 'div.section-times').text.strip()
-#             except:
-#                 time = "N/A"
-
-#             try:
-#                 price = card.find_element(By.CSS_SELECTOR, 'span.price-text').text.strip()
-#             except:
-#                 price = "N/A"
-
-#             try:
-#                 duration = card.find_element(By.CSS_SELECTOR, 'div.duration').text.strip()
-#             except:
-#                 duration = "N/A"
-
-#             try:
-#                 layovers = card.find_element(By.CSS_SELECTOR, 'div.stops-text').text.strip()
-#             except:
-#                 layovers = "N/A"
-
-#             flights.append({
-#                 "type": "flight",
-#                 "airline": airline,
-#                 "route": f"{origin_code} to {destination_code}",
-#                 "date": start_date_str,
-#                 "price": price,
-#                 "time": time,
-#                 "duration": duration,
-#                 "layovers": layovers,
-#             })
-
-#         return flights
-
-#     finally:
-#         driver.quit()
-
-# # Load airport city to IATA code mapping once
-# airport_map = {}
-
-# def load_airport_codes(csv_path='airports.dat'):
-#     global airport_map
-#     with open(csv_path, encoding='utf-8') as f:
-#         reader = csv.reader(f)
-#         for row in reader:
-#             # row format: ID, Name, City, Country, IATA, ICAO, ...
-#             city = row[2].strip().lower()
-#             iata = row[4].strip()
-#             if iata and city:
-#                 # If multiple airports per city, this keeps last, consider list for multiple airports
-#                 airport_map[city] = iata
-
-# def get_airport_code(city_name):
-#     if not airport_map:
-#         load_airport_codes()
-#     return airport_map.get(city_name.strip().lower(), None)
\ No newline at end of file
@@ -0,0 +1,80 @@
+"""
+Compares per-document indexing (one encode + one add per doc, as the scripts
+used to do) against ingest.index_documents (one batched encode + one upsert).
+
+    python benchIngest.py --sizes 10 100 10000
+"""
+import argparse
+import time
+
+import chromadb
+from sentence_transformers import SentenceTransformer
+
+from ingest import hotel_to_text, index_documents
+
+
+def make_hotels(count):
+    return [
+        {
+            "type": "hotel",
+            "name": f"Hotel {i}",
+            "location": f"City {i % 50}",
+            "price_per_night": f"US${80 + i % 300}",
+            "rating": f"{6 + (i % 40) / 10:.1f} / Good",
+        }
+        for i in range(count)
+    ]
+
+
+def index_one_by_one(collection, embedder, texts, ids, metadatas):
+    for doc_id, text, meta in zip(ids, texts, metadatas):
+        embedding = embedder.encode(text).tolist()
+        collection.add(
+            ids=[doc_id],
+            documents=[text],
+            embeddings=[embedding],
+            metadatas=[meta],
+        )
+
+
+def run(label, fn, client, embedder, size):
+    hotels = make_hotels(size)
+    texts = [hotel_to_text(h) for h in hotels]
+    ids = [f"bench_{i}" for i in range(size)]
+
+    name = f"bench_{label}_{size}"
+    collection = client.get_or_create_collection(name=name)
+    started = time.perf_counter()
+    fn(collection, embedder, texts, ids, hotels)
+    elapsed = time.perf_counter() - started
+    client.delete_collection(name)
+    return elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark per-doc vs batched indexing")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10, 100, 10000])
+    parser.add_argument("--skip-per-doc-above", type=int, default=None,
+                        help="Skip the slow per-doc run for sizes above this")
+    args = parser.parse_args()
+
+    embedder = SentenceTransformer("all-MiniLM-L6-v2")
+    client = chromadb.EphemeralClient()
+    # Warm the model so the first measurement does not include lazy init
+    embedder.encode(["warm up"])
+
+    print(f"{'docs':>8} {'per-doc s':>10} {'docs/s':>10} {'batched s':>10} {'docs/s':>10} {'speedup':>8}")
+    for size in args.sizes:
+        batched = run("batched", index_documents, client, embedder, size)
+        if args.skip_per_doc_above is not None and size > args.skip_per_doc_above:
+            print(f"{size:>8} {'-':>10} {'-':>10} {batched:>10.3f} {size / batched:>10.1f} {'-':>8}")
+            continue
+        per_doc = run("per_doc", index_one_by_one, client, embedder, size)
+        print(
+            f"{size:>8} {per_doc:>10.3f} {size / per_doc:>10.1f} "
+            f"{batched:>10.3f} {size / batched:>10.1f} {per_doc / batched:>7.1f}x"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,44 @@
+"""
+Parse time per page for the saved Booking.com fixtures across the available
+parsers, plus the hotelFetch fast path (which skips card-less pages).
+
+    python benchParsing.py --repeat 20
+"""
+import argparse
+import time
+
+from hotelFetch import PARSERS, parse_property_cards
+
+FIXTURES = ["booking_search.html", "debug_output.html"]
+
+
+def time_per_page(fn, repeat):
+    started = time.perf_counter()
+    for _ in range(repeat):
+        fn()
+    return (time.perf_counter() - started) / repeat * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark hotel card parsing")
+    parser.add_argument("--repeat", type=int, default=20)
+    parser.add_argument("fixtures", nargs="*", default=FIXTURES)
+    args = parser.parse_args()
+
+    print(f"{'fixture':<24} {'parser':<12} {'ms/page':>10} {'cards':>6}")
+    for path in args.fixtures:
+        with open(path, encoding="utf-8") as f:
+            page = f.read()
+
+        for name, parse in sorted(PARSERS.items()):
+            cards = len(list(parse(page, 25)))
+            ms = time_per_page(lambda: list(parse(page, 25)), args.repeat)
+            print(f"{path:<24} {name:<12} {ms:>10.2f} {cards:>6}")
+
+        cards = len(parse_property_cards(page, "fixture", limit=25))
+        ms = time_per_page(lambda: parse_property_cards(page, "fixture", limit=25), args.repeat)
+        print(f"{path:<24} {'fast path':<12} {ms:>10.2f} {cards:>6}")
+
+
+if __name__ == "__main__":
+    main()
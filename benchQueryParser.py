@@ -0,0 +1,127 @@
+"""
+Accuracy and throughput of queryParser on a labelled set of questions, next to
+the regexes travelRag and ragQuery used before it.
+
+    python benchQueryParser.py --repeat 200
+
+Dates are resolved relative to a fixed day (TODAY) so the labels stay valid.
+"""
+import argparse
+import re
+import time
+from datetime import date
+
+from queryParser import parse_query, get_gazetteer
+
+TODAY = date(2025, 7, 1)
+
+LABELLED = [
+    ("Find me a hotel in Tokyo under $200 with good reviews.",
+     {"intent": "hotel", "destination": "Tokyo", "max_price": 200.0, "min_rating": 8.0}),
+    ("Compare flights from SFO to NYC next weekend.",
+     {"intent": "flight", "origin": "San Francisco", "destination": "New York",
+      "start_date": "2025-07-12", "end_date": "2025-07-13"}),
+    ("Suggest a 3-day itinerary for Barcelona.", {"intent": "hotel", "destination": "Barcelona"}),
+    ("Show me flights from New York to Paris", {"intent": "flight", "origin": "New York", "destination": "Paris"}),
+    ("hotels in Paris rated 8.5 or better", {"intent": "hotel", "destination": "Paris", "min_rating": 8.5}),
+    ("cheap hotel in New York below 150 EUR", {"intent": "hotel", "destination": "New York", "max_price": 150.0}),
+    ("hotels in Rome", {"intent": "hotel", "destination": "Rome"}),
+    ("hotel in Berlin for under €120", {"intent": "hotel", "destination": "Berlin", "max_price": 120.0}),
+    ("flights to London from Boston on 12 Sept",
+     {"intent": "flight", "origin": "Boston", "destination": "London", "start_date": "2025-09-12"}),
+    ("fly LHR to JFK on 2025-08-01",
+     {"intent": "flight", "origin": "London", "destination": "New York", "start_date": "2025-08-01"}),
+    ("What are the best hotels in Rome on March 3-7?",
+     {"intent": "hotel", "destination": "Rome", "start_date": "2026-03-03", "end_date": "2026-03-07"}),
+    ("hotels in New York City for 3 nights from July 10",
+     {"intent": "hotel", "destination": "New York", "start_date": "2025-07-10", "end_date": "2025-07-13"}),
+    ("I want to stay in Lisbon tomorrow", {"intent": "hotel", "destination": "Lisbon", "start_date": "2025-07-02"}),
+    ("any well rated hotels in amsterdam?", {"intent": "hotel", "destination": "Amsterdam", "min_rating": 8.0}),
+    ("Flights from Chicago to Los Angeles on August 5th",
+     {"intent": "flight", "origin": "Chicago", "destination": "Los Angeles", "start_date": "2025-08-05"}),
+    ("Where should I stay in San Francisco this weekend with a budget of $250",
+     {"intent": "hotel", "destination": "San Francisco", "start_date": "2025-07-05", "end_date": "2025-07-06",
+      "max_price": 250.0}),
+    ("hotel in Madrid with rating above 9", {"intent": "hotel", "destination": "Madrid", "min_rating": 9.0}),
+    ("flights from Seattle to Tokyo next week",
+     {"intent": "flight", "origin": "Seattle", "destination": "Tokyo",
+      "start_date": "2025-07-07", "end_date": "2025-07-13"}),
+    ("Hotels near Dubai under 300 AED", {"intent": "hotel", "destination": "Dubai", "max_price": 300.0}),
+    ("book a room in Sydney from December 20 to 27",
+     {"intent": "hotel", "destination": "Sydney", "start_date": "2025-12-20", "end_date": "2025-12-27"}),
+    # Head counts are not budgets, and cities count without "in" or "to" before them
+    ("hotel in New York for up to 4 guests", {"intent": "hotel", "destination": "New York"}),
+    ("cheap Paris hotels under 200", {"intent": "hotel", "destination": "Paris", "max_price": 200.0}),
+    ("I want to go to Rome", {"intent": "hotel", "destination": "Rome"}),
+    ("Lisbon for 2 adults up to 120 EUR", {"intent": "hotel", "destination": "Lisbon", "max_price": 120.0}),
+]
+FIELDS = ["intent", "origin", "destination", "start_date", "end_date", "max_price", "min_rating"]
+
+
+def legacy_parse(question):
+    """
+    The extraction travelRag did before queryParser: a from/to regex for flights,
+    otherwise the text after "in".
+    """
+    result = {}
+    match = re.search(r"from ([A-Za-z ]+) to ([A-Za-z ]+)", question, re.IGNORECASE)
+    if match:
+        result["origin"] = match.group(1).strip()
+        result["destination"] = match.group(2).strip()
+        return result
+    match = re.search(r"in ([A-Za-z ]+)", question, re.IGNORECASE)
+    if match:
+        result["destination"] = match.group(1).strip()
+    return result
+
+
+def parser_fields(question):
+    return parse_query(question, today=TODAY)._asdict()
+
+
+def accuracy(parse):
+    """
+    Share of labelled fields (including ones that should stay empty) parsed exactly.
+    """
+    correct = total = 0
+    misses = []
+    for question, expected in LABELLED:
+        parsed = parse(question)
+        for field in FIELDS:
+            total += 1
+            if parsed.get(field) == expected.get(field):
+                correct += 1
+            else:
+                misses.append(f"{question!r} {field}: got {parsed.get(field)!r}, want {expected.get(field)!r}")
+    return correct / total, misses
+
+
+def throughput(parse, repeat):
+    started = time.perf_counter()
+    for _ in range(repeat):
+        for question, _ in LABELLED:
+            parse(question)
+    return repeat * len(LABELLED) / (time.perf_counter() - started)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark query parsing")
+    parser.add_argument("--repeat", type=int, default=200)
+    parser.add_argument("--show-misses", action="store_true")
+    args = parser.parse_args()
+
+    started = time.perf_counter()
+    get_gazetteer()
+    print(f"Gazetteer built in {time.perf_counter() - started:.3f}s")
+
+    print(f"{'parser':<12} {'accuracy':>9} {'parses/s':>10}")
+    for name, parse in (("legacy", legacy_parse), ("queryParser", parser_fields)):
+        score, misses = accuracy(parse)
+        print(f"{name:<12} {score:>8.1%} {throughput(parse, args.repeat):>10.0f}")
+        if args.show_misses:
+            for miss in misses:
+                print("  " + miss)
+
+
+if __name__ == "__main__":
+    main()
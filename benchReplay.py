@@ -0,0 +1,197 @@
+"""
+Offline performance suite: runs the Flask endpoints against synthetic HTML
+fixtures (SCRAPER_MODE=replay) and a stub Ollama server, and reports
+end-to-end latency, parsing throughput and peak memory.
+
+    python benchReplay.py --iterations 20 --save bench.json
+    python benchReplay.py --compare bench.json --tolerance 0.25
+
+With --compare the script exits non-zero when any metric regressed by more
+than the tolerance, so it can gate changes without network access.
+"""
+import argparse
+import json
+import os
+import statistics
+import sys
+import time
+import tracemalloc
+
+os.environ["SCRAPER_MODE"] = "replay"
+
+from ollamaStub import start_stub_server
+
+STUB_ANSWER = "Stay at the first hotel and take the morning flight."
+stub = start_stub_server(answer=STUB_ANSWER)
+os.environ["OLLAMA_HOST"] = stub.url
+
+import app as trip_app
+from hotelFetch import PARSERS, parse_property_cards
+
+# A results page with cards, and a captured bot-check page that should short-circuit
+FIXTURES = ["booking_search_results.html", "booking_search.html"]
+JOB_TIMEOUT = 30
+
+
+def run_job(client, path, payload, poll=0.002, timeout=JOB_TIMEOUT):
+    """
+    Submits a job-backed endpoint and polls until the job finishes, for at most
+    timeout seconds.
+    """
+    response = client.post(path, json=payload)
+    body = response.get_json()
+    if response.status_code != 202:
+        raise RuntimeError(f"{path} answered {response.status_code}: {body}")
+    status_url = body["status_url"]
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        job = client.get(status_url).get_json()
+        if job["status"] in ("done", "failed"):
+            return job
+        time.sleep(poll)
+    raise TimeoutError(f"{path} job did not finish within {timeout}s")
+
+
+def check_replay(client, trip, recommendation):
+    """
+    Runs each endpoint once against cold caches and returns the reasons the run
+    did not cover the whole pipeline (hotel cards, detail prices, flights, LLM).
+    """
+    trip_app.hotel_cache.invalidate()
+    trip_app.flight_cache.invalidate()
+    problems = []
+
+    llm_calls = len(stub.requests)
+    job = run_job(client, "/api/recommendations", recommendation)
+    if job["status"] != "done":
+        return [f"recommendations job {job['status']}: {job['error']}"]
+    sources = job["result"]["sources"]
+    for name in ("hotels", "flights"):
+        if not sources[name]["count"]:
+            problems.append(f"no {name} scraped from the fixtures ({sources[name]['status']})")
+    if len(stub.requests) == llm_calls or job["result"]["response"] != STUB_ANSWER:
+        problems.append("recommendations did not call the stub LLM")
+
+    hotels = trip_app.get_hotels(recommendation["destination"], recommendation.get("start_date"))
+    if any(h["price_per_night"] in ("N/A", "pending") for h in hotels):
+        problems.append("hotel detail prices were not filled in")
+
+    job = run_job(client, "/api/trip", trip)
+    if job["status"] != "done" or "No hotels found" in job["result"]["response"]:
+        problems.append("trip search returned no hotels")
+    return problems
+
+
+def measure(fn, iterations):
+    timings = []
+    for _ in range(iterations):
+        started = time.perf_counter()
+        fn()
+        timings.append((time.perf_counter() - started) * 1000)
+    timings.sort()
+    return {
+        "median_ms": statistics.median(timings),
+        "p95_ms": timings[min(len(timings) - 1, int(len(timings) * 0.95))],
+    }
+
+
+def peak_memory_kib(fn):
+    tracemalloc.start()
+    try:
+        fn()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return peak / 1024
+
+
+def endpoint_benchmarks(iterations):
+    client = trip_app.app.test_client()
+    trip = {"name": "Bench", "destination": "Paris", "start_date": "2025-07-10", "end_date": "2025-07-12"}
+    recommendation = {"destination": "Paris", "origin": "New York", "start_date": "2025-07-10"}
+
+    def cold(path, payload):
+        def run():
+            trip_app.hotel_cache.invalidate()
+            trip_app.flight_cache.invalidate()
+            run_job(client, path, payload)
+        return run
+
+    def warm(path, payload):
+        return lambda: run_job(client, path, payload)
+
+    problems = check_replay(client, trip, recommendation)
+    if problems:
+        stub.shutdown()
+        sys.exit("❌ Replay run does not exercise the pipeline:\n  " + "\n  ".join(problems))
+
+    results = {}
+    for name, path, payload in (
+        ("trip", "/api/trip", trip),
+        ("recommendations", "/api/recommendations", recommendation),
+    ):
+        results[f"{name}_cold"] = measure(cold(path, payload), iterations)
+        results[f"{name}_warm"] = measure(warm(path, payload), iterations)
+        results[f"{name}_peak_kib"] = {"peak_kib": peak_memory_kib(cold(path, payload))}
+    return results
+
+
+def parsing_benchmarks(iterations):
+    results = {}
+    for filename in FIXTURES:
+        with open(filename, encoding="utf-8") as f:
+            page = f.read()
+        for parser_name, parse in sorted(PARSERS.items()):
+            timing = measure(lambda: list(parse(page, 25)), iterations)
+            results[f"parse_{filename}_{parser_name}"] = timing
+        results[f"parse_{filename}_fast_path"] = measure(
+            lambda: parse_property_cards(page, "Paris", limit=25), iterations
+        )
+    return results
+
+
+def compare(results, baseline, tolerance):
+    regressions = []
+    for name, metrics in results.items():
+        for metric, value in metrics.items():
+            previous = baseline.get(name, {}).get(metric)
+            if previous and value > previous * (1 + tolerance):
+                regressions.append(f"{name}.{metric}: {previous:.2f} -> {value:.2f}")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Offline replay benchmark suite")
+    parser.add_argument("--iterations", type=int, default=20)
+    parser.add_argument("--save", help="Write results to this JSON file")
+    parser.add_argument("--compare", help="Baseline JSON file to compare against")
+    parser.add_argument("--tolerance", type=float, default=0.25)
+    args = parser.parse_args()
+
+    results = {}
+    results.update(endpoint_benchmarks(args.iterations))
+    results.update(parsing_benchmarks(args.iterations))
+
+    for name, metrics in results.items():
+        formatted = "  ".join(f"{metric}={value:.2f}" for metric, value in metrics.items())
+        print(f"{name:<48} {formatted}")
+
+    if args.save:
+        with open(args.save, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2)
+
+    stub.shutdown()
+
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as f:
+            regressions = compare(results, json.load(f), args.tolerance)
+        if regressions:
+            print("\n❌ Performance regressions:")
+            for line in regressions:
+                print("  " + line)
+            sys.exit(1)
+        print("\n✅ No regressions beyond tolerance")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,77 @@
+"""
+Cold-start benchmark: imports each entry point in a fresh interpreter and
+reports the import time and resident memory. It runs each module twice: a
+lazy import (the current behaviour) and an import followed by loading every
+registered resource (equivalent to the old eager start-up).
+
+    python benchStartup.py --runs 3
+    python benchStartup.py --modules app --save startup.json
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+PROBE = """
+import json, resource, sys, time
+started = time.perf_counter()
+__import__(sys.argv[1])
+imported = time.perf_counter() - started
+loaded = None
+if sys.argv[2] == "eager":
+    from resources import registry
+    names = [name for name in registry.stats() if name not in ("db_pool", "trip_store")]
+    for name in names:
+        registry.get(name)
+    loaded = time.perf_counter() - started
+print(json.dumps({
+    "import_seconds": imported,
+    "ready_seconds": loaded if loaded is not None else imported,
+    "max_rss_mib": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024,
+}))
+"""
+
+
+def probe(module, mode):
+    env = dict(os.environ, SCRAPER_MODE=os.getenv("SCRAPER_MODE", "replay"), WARM_UP="")
+    output = subprocess.run(
+        [sys.executable, "-c", PROBE, module, mode],
+        env=env, capture_output=True, text=True, check=True,
+    ).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Entry point cold-start benchmark")
+    parser.add_argument("--modules", nargs="+", default=["app", "travelRag", "ragQuery"])
+    parser.add_argument("--runs", type=int, default=3)
+    parser.add_argument("--save", help="Write results to this JSON file")
+    args = parser.parse_args()
+
+    results = {}
+    for module in args.modules:
+        for mode in ("lazy", "eager"):
+            try:
+                runs = [probe(module, mode) for _ in range(args.runs)]
+            except subprocess.CalledProcessError as e:
+                print(f"❌ {module} ({mode}) failed:\n{e.stderr.strip()}")
+                continue
+            result = {
+                metric: statistics.median(run[metric] for run in runs)
+                for metric in runs[0]
+            }
+            results[f"{module}_{mode}"] = result
+            print(
+                f"{module:<10} {mode:<6} import={result['import_seconds']:.2f}s "
+                f"ready={result['ready_seconds']:.2f}s rss={result['max_rss_mib']:.0f}MiB"
+            )
+
+    if args.save:
+        with open(args.save, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,10 +1,220 @@
+"""
+Exports a Chroma collection page by page, and imports a dump back.
+
+    python chromadump.py                                  # NDJSON to stdout
+    python chromadump.py export dump.ndjson --type hotel --location Paris
+    python chromadump.py export dump.parquet --embeddings
+    python chromadump.py --path ./chromadb_rebuilt import dump.parquet
+
+Only one page of documents is held in memory at a time. Dumps that include
+embeddings are re-imported without running the model; others are re-embedded.
+Parquet needs pyarrow.
+"""
+import argparse
+import json
+import sys
+
 import chromadb
 
-chroma_client = chromadb.PersistentClient(path="./chromadb_persist")
-collection = chroma_client.get_or_create_collection(name="travel_data")
+from ingest import metadata_filter, index_documents
+from resources import CHROMA_PATH, COLLECTION_NAME
+
+PAGE_SIZE = 1000
+
+
+def _to_list(embedding):
+    return embedding.tolist() if hasattr(embedding, "tolist") else list(embedding)
+
+
+def iter_pages(collection, where=None, embeddings=False, page_size=PAGE_SIZE):
+    """
+    Yields lists of {"id", "document", "metadata"[, "embedding"]} records.
+    """
+    include = ["documents", "metadatas"] + (["embeddings"] if embeddings else [])
+    offset = 0
+    while True:
+        page = collection.get(where=where, include=include, limit=page_size, offset=offset)
+        if not page["ids"]:
+            return
+        records = []
+        for i, doc_id in enumerate(page["ids"]):
+            record = {
+                "id": doc_id,
+                "document": page["documents"][i],
+                "metadata": page["metadatas"][i],
+            }
+            if embeddings:
+                record["embedding"] = _to_list(page["embeddings"][i])
+            records.append(record)
+        yield records
+        offset += len(page["ids"])
+
+
+def dump_format(path, requested=None):
+    if requested:
+        return requested
+    return "parquet" if path.endswith(".parquet") else "ndjson"
+
+
+def write_ndjson(pages, path):
+    out = sys.stdout if path == "-" else open(path, "w", encoding="utf-8")
+    count = 0
+    try:
+        for records in pages:
+            for record in records:
+                out.write(json.dumps(record, ensure_ascii=False) + "\n")
+            count += len(records)
+    finally:
+        if out is not sys.stdout:
+            out.close()
+    return count
+
+
+def _parquet():
+    try:
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+    except ImportError:
+        sys.exit("❌ Parquet dumps need pyarrow (pip install pyarrow)")
+    return pa, pq
+
+
+def write_parquet(pages, path, embeddings=False):
+    """
+    One row group per page. Metadata is stored as a JSON string, since its keys
+    differ between hotels and flights.
+    """
+    pa, pq = _parquet()
+    fields = [
+        ("id", pa.string()),
+        ("document", pa.string()),
+        ("metadata", pa.string()),
+    ]
+    if embeddings:
+        fields.append(("embedding", pa.list_(pa.float32())))
+    schema = pa.schema(fields)
+
+    count = 0
+    with pq.ParquetWriter(path, schema) as writer:
+        for records in pages:
+            columns = {
+                "id": [r["id"] for r in records],
+                "document": [r["document"] for r in records],
+                "metadata": [json.dumps(r["metadata"], ensure_ascii=False) for r in records],
+            }
+            if embeddings:
+                columns["embedding"] = [r["embedding"] for r in records]
+            writer.write_table(pa.table(columns, schema=schema))
+            count += len(records)
+    return count
+
+
+def read_ndjson(path, page_size=PAGE_SIZE):
+    src = sys.stdin if path == "-" else open(path, encoding="utf-8")
+    try:
+        records = []
+        for line in src:
+            if line.strip():
+                records.append(json.loads(line))
+            if len(records) >= page_size:
+                yield records
+                records = []
+        if records:
+            yield records
+    finally:
+        if src is not sys.stdin:
+            src.close()
+
+
+def read_parquet(path, page_size=PAGE_SIZE):
+    _, pq = _parquet()
+    for batch in pq.ParquetFile(path).iter_batches(batch_size=page_size):
+        records = batch.to_pylist()
+        for record in records:
+            record["metadata"] = json.loads(record["metadata"]) if record["metadata"] else None
+        yield records
+
+
+def import_pages(collection, pages, embedder_factory):
+    """
+    Upserts dumped records. Pages without embeddings go through the normal
+    indexing path, which embeds only documents that are new or changed.
+    """
+    count = 0
+    for records in pages:
+        ids = [r["id"] for r in records]
+        documents = [r["document"] for r in records]
+        metadatas = [r["metadata"] or None for r in records]
+        if all(r.get("embedding") is not None for r in records):
+            collection.upsert(
+                ids=ids,
+                documents=documents,
+                embeddings=[r["embedding"] for r in records],
+                metadatas=metadatas,
+            )
+        else:
+            index_documents(collection, embedder_factory(), documents, ids, [m or {} for m in metadatas])
+        count += len(records)
+        print(f"  {count} documents imported", file=sys.stderr)
+    return count
+
+
+def export_command(args):
+    client = chromadb.PersistentClient(path=args.path)
+    collection = client.get_collection(name=args.collection)
+    pages = iter_pages(
+        collection,
+        where=metadata_filter(args.location, args.type),
+        embeddings=args.embeddings,
+        page_size=args.page_size,
+    )
+    if dump_format(args.output, args.format) == "parquet":
+        count = write_parquet(pages, args.output, embeddings=args.embeddings)
+    else:
+        count = write_ndjson(pages, args.output)
+    print(f"✅ Exported {count} documents from {args.collection}", file=sys.stderr)
+
+
+def import_command(args):
+    from resources import get_embedder
+
+    client = chromadb.PersistentClient(path=args.path)
+    collection = client.get_or_create_collection(name=args.collection)
+    if dump_format(args.input, args.format) == "parquet":
+        pages = read_parquet(args.input, args.page_size)
+    else:
+        pages = read_ndjson(args.input, args.page_size)
+    count = import_pages(collection, pages, get_embedder)
+    print(f"✅ Imported {count} documents into {args.collection}", file=sys.stderr)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Export or import a Chroma collection")
+    parser.add_argument("--path", default=CHROMA_PATH, help="Chroma persist directory")
+    parser.add_argument("--collection", default=COLLECTION_NAME)
+    parser.add_argument("--page-size", type=int, default=PAGE_SIZE)
+    parser.add_argument("--format", choices=["ndjson", "parquet"],
+                        help="Defaults to parquet for .parquet files, otherwise ndjson")
+    commands = parser.add_subparsers(dest="command")
+
+    export = commands.add_parser("export", help="Write the collection to a dump")
+    export.add_argument("output", nargs="?", default="-", help="Output file, or - for stdout")
+    export.add_argument("--embeddings", action="store_true", help="Include embeddings")
+    export.add_argument("--type", help="Only documents of this type (hotel, flight)")
+    export.add_argument("--location", help="Only documents for this location")
+
+    load = commands.add_parser("import", help="Upsert a dump into the collection")
+    load.add_argument("input", help="Dump file, or - for stdin (NDJSON)")
+
+    args = parser.parse_args(argv)
+    if args.command == "import":
+        import_command(args)
+    else:
+        if args.command is None:
+            # Plain "python chromadump.py" prints everything as NDJSON
+            args.output, args.embeddings, args.type, args.location = "-", False, None, None
+        export_command(args)
+
 
-results = collection.get()
-for doc, meta in zip(results["documents"], results["metadatas"]):
-    print(doc)
-    print(meta)
-    print("---")
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,162 @@
+"""
+Thread-safe PostgreSQL connection pool shared by the Flask app and scripts.
+
+Pool sizing comes from DATABASE_URL query parameters, which are stripped before
+connecting:
+
+    postgresql://user@host/db?pool_min=2&pool_max=20&pool_timeout=10
+"""
+import os
+import threading
+import time
+from contextlib import contextmanager
+from urllib.parse import urlparse, parse_qsl, urlencode, urlunparse
+
+import psycopg2
+from psycopg2 import pool as pg_pool
+
+DATABASE_URL = os.getenv("DATABASE_URL", "postgresql://localhost")
+# Idle connections older than this are pinged before being handed out
+HEALTH_CHECK_INTERVAL = 30
+
+
+def parse_database_url(database_url):
+    """
+    Splits pool settings out of the URL. Returns (dsn, min_size, max_size, timeout).
+    """
+    parsed = urlparse(database_url)
+    params = dict(parse_qsl(parsed.query))
+    min_size = int(params.pop("pool_min", os.getenv("DB_POOL_MIN", "1")))
+    max_size = int(params.pop("pool_max", os.getenv("DB_POOL_MAX", "10")))
+    timeout = float(params.pop("pool_timeout", os.getenv("DB_POOL_TIMEOUT", "10")))
+    dsn = urlunparse(parsed._replace(query=urlencode(params)))
+    return dsn, min_size, max_size, timeout
+
+
+class PoolTimeout(Exception):
+    pass
+
+
+class ConnectionPool:
+    """
+    Wraps psycopg2's ThreadedConnectionPool so callers block (up to timeout)
+    instead of failing when every connection is busy, and so dropped
+    connections are detected and replaced on checkout.
+    """
+
+    def __init__(self, database_url=DATABASE_URL):
+        self.dsn, self.min_size, self.max_size, self.timeout = parse_database_url(database_url)
+        self._pool = pg_pool.ThreadedConnectionPool(self.min_size, self.max_size, self.dsn)
+        self._slots = threading.BoundedSemaphore(self.max_size)
+        self._lock = threading.Lock()
+        self._last_used = {}
+
+        self._checkouts = 0
+        self._in_use = 0
+        self._reconnects = 0
+        self._total_wait = 0.0
+        self._max_wait = 0.0
+        self._timeouts = 0
+
+    def _healthy(self, conn):
+        if conn.closed:
+            return False
+        last_used = self._last_used.get(id(conn), 0)
+        if time.time() - last_used < HEALTH_CHECK_INTERVAL:
+            return True
+        try:
+            with conn.cursor() as cur:
+                cur.execute("SELECT 1")
+            conn.rollback()
+            return True
+        except psycopg2.Error:
+            return False
+
+    def getconn(self):
+        started = time.time()
+        if not self._slots.acquire(timeout=self.timeout):
+            with self._lock:
+                self._timeouts += 1
+            raise PoolTimeout(f"No database connection available within {self.timeout}s")
+
+        try:
+            conn = self._pool.getconn()
+            while not self._healthy(conn):
+                self._pool.putconn(conn, close=True)
+                with self._lock:
+                    self._reconnects += 1
+                conn = self._pool.getconn()
+        except Exception:
+            self._slots.release()
+            raise
+
+        waited = time.time() - started
+        with self._lock:
+            self._checkouts += 1
+            self._in_use += 1
+            self._total_wait += waited
+            self._max_wait = max(self._max_wait, waited)
+        return conn
+
+    def putconn(self, conn, broken=False):
+        close = broken or conn.closed
+        self._last_used[id(conn)] = time.time()
+        if close:
+            self._last_used.pop(id(conn), None)
+        self._pool.putconn(conn, close=close)
+        with self._lock:
+            self._in_use -= 1
+        self._slots.release()
+
+    @contextmanager
+    def connection(self):
+        """
+        Borrows a connection; commits on success, rolls back on error, and discards
+        connections that died while in use.
+        """
+        conn = self.getconn()
+        broken = False
+        try:
+            yield conn
+            conn.commit()
+        except (psycopg2.OperationalError, psycopg2.InterfaceError):
+            broken = True
+            raise
+        except Exception:
+            if not conn.closed:
+                conn.rollback()
+            raise
+        finally:
+            self.putconn(conn, broken=broken)
+
+    def stats(self):
+        with self._lock:
+            return {
+                "min_size": self.min_size,
+                "max_size": self.max_size,
+                "in_use": self._in_use,
+                "checkouts": self._checkouts,
+                "reconnects": self._reconnects,
+                "timeouts": self._timeouts,
+                "avg_wait_seconds": self._total_wait / self._checkouts if self._checkouts else 0.0,
+                "max_wait_seconds": self._max_wait,
+            }
+
+    def close(self):
+        self._pool.closeall()
+
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def get_pool():
+    """
+    Returns the process-wide pool, connecting on first use.
+    """
+    global _pool
+    if _pool is None:
+        with _pool_lock:
+            if _pool is None:
+                _pool = ConnectionPool()
+    return _pool
@@ -0,0 +1,237 @@
+import itertools
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+
+from selenium import webdriver
+from selenium.common.exceptions import WebDriverException
+from selenium.webdriver.chrome.service import Service
+from selenium.webdriver.chrome.options import Options
+from webdriver_manager.chrome import ChromeDriverManager
+
+USER_AGENT = (
+    "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 "
+    "(KHTML, like Gecko) Chrome/122.0.0.0 Safari/537.36"
+)
+
+
+def default_chrome_options():
+    options = Options()
+    options.add_argument("--headless")
+    options.add_argument("--disable-gpu")
+    options.add_argument("--no-sandbox")
+    options.add_argument("--disable-dev-shm-usage")
+    options.add_argument("--window-size=1920,1080")
+    options.add_argument(f"user-agent={USER_AGENT}")
+    return options
+
+
+class PooledDriver:
+    """
+    A Chrome session owned by the pool, with bookkeeping for recycling.
+    """
+
+    _ids = itertools.count(1)
+
+    def __init__(self, driver):
+        self.id = next(PooledDriver._ids)
+        self.driver = driver
+        self.created_at = time.time()
+        self.uses = 0
+
+    def age(self):
+        return time.time() - self.created_at
+
+
+class DriverPool:
+    """
+    Bounded pool of headless Chrome sessions.
+
+    The chromedriver binary is resolved once when the pool is created. Sessions
+    are started on demand up to max_size, handed out one caller at a time, reset
+    to a blank page with cookies cleared when returned, and replaced once they
+    crash, exceed max_uses or grow older than max_age seconds. Page loads give up
+    after page_load_timeout seconds instead of Selenium's five minutes.
+    """
+
+    def __init__(self, max_size=3, max_uses=50, max_age=30 * 60,
+                 acquire_timeout=60, page_load_timeout=30, options_factory=default_chrome_options):
+        self.max_size = max_size
+        self.max_uses = max_uses
+        self.max_age = max_age
+        self.acquire_timeout = acquire_timeout
+        self.page_load_timeout = page_load_timeout
+        self.options_factory = options_factory
+        self.driver_path = ChromeDriverManager().install()
+
+        self._idle = deque()
+        self._lock = threading.Lock()
+        # Signalled whenever a session is returned or a slot is freed by a discard
+        self._available = threading.Condition(self._lock)
+        self._size = 0
+        self._in_use = 0
+        self._closed = False
+
+        self._acquired = 0
+        self._created = 0
+        self._recycled = 0
+        self._total_wait = 0.0
+        self._max_wait = 0.0
+        self._reuse_counts = {}
+
+    def _start_driver(self):
+        driver = webdriver.Chrome(
+            service=Service(self.driver_path),
+            options=self.options_factory(),
+        )
+        driver.set_page_load_timeout(self.page_load_timeout)
+        pooled = PooledDriver(driver)
+        with self._lock:
+            self._created += 1
+        return pooled
+
+    def _is_stale(self, pooled):
+        if pooled.uses >= self.max_uses or pooled.age() >= self.max_age:
+            return True
+        try:
+            # Any round trip to the browser fails fast once it has crashed. A dead
+            # chromedriver surfaces as urllib3 errors rather than WebDriverException.
+            pooled.driver.current_url
+        except Exception:
+            return True
+        return False
+
+    def _discard(self, pooled):
+        try:
+            pooled.driver.quit()
+        except Exception:
+            pass
+        with self._lock:
+            self._size -= 1
+            self._recycled += 1
+            self._reuse_counts.pop(pooled.id, None)
+            self._available.notify()
+
+    def _reset(self, pooled):
+        """
+        Clears per-request browser state so the next caller gets a clean session.
+        """
+        driver = pooled.driver
+        handles = driver.window_handles
+        if not handles:
+            raise WebDriverException("Browser has no open windows")
+        for handle in handles[1:]:
+            driver.switch_to.window(handle)
+            driver.close()
+        driver.switch_to.window(handles[0])
+        driver.delete_all_cookies()
+        # Callers may have shortened it to fit a request deadline
+        driver.set_page_load_timeout(self.page_load_timeout)
+        driver.get("about:blank")
+
+    def acquire(self, timeout=None):
+        """
+        Waits up to timeout seconds (acquire_timeout by default) for a session.
+        """
+        started = time.time()
+        deadline = started + (self.acquire_timeout if timeout is None else timeout)
+        pooled = None
+
+        while pooled is None:
+            grow = False
+            with self._available:
+                while True:
+                    if self._closed:
+                        raise RuntimeError("Driver pool is closed")
+                    if self._idle:
+                        pooled = self._idle.popleft()
+                        break
+                    if self._size < self.max_size:
+                        self._size += 1
+                        grow = True
+                        break
+                    remaining = deadline - time.time()
+                    if remaining <= 0:
+                        raise TimeoutError("Timed out waiting for a browser session")
+                    self._available.wait(remaining)
+
+            if grow:
+                try:
+                    pooled = self._start_driver()
+                except Exception:
+                    with self._available:
+                        self._size -= 1
+                        self._available.notify()
+                    raise
+
+            if self._is_stale(pooled):
+                self._discard(pooled)
+                pooled = None
+
+        waited = time.time() - started
+        with self._lock:
+            pooled.uses += 1
+            self._in_use += 1
+            self._acquired += 1
+            self._total_wait += waited
+            self._max_wait = max(self._max_wait, waited)
+            self._reuse_counts[pooled.id] = pooled.uses
+        return pooled
+
+    def release(self, pooled, broken=False):
+        with self._lock:
+            self._in_use -= 1
+
+        if not broken and not self._closed:
+            try:
+                self._reset(pooled)
+            except Exception:
+                broken = True
+
+        if broken or self._closed:
+            self._discard(pooled)
+        else:
+            with self._available:
+                self._idle.append(pooled)
+                self._available.notify()
+
+    @contextmanager
+    def session(self, timeout=None):
+        """
+        Borrow a driver for the duration of a with-block. Any exception escaping
+        the block marks the session broken, so it is replaced rather than reused.
+        """
+        pooled = self.acquire(timeout)
+        broken = False
+        try:
+            yield pooled.driver
+        except Exception:
+            broken = True
+            raise
+        finally:
+            self.release(pooled, broken=broken)
+
+    def stats(self):
+        with self._lock:
+            return {
+                "max_size": self.max_size,
+                "size": self._size,
+                "in_use": self._in_use,
+                "idle": len(self._idle),
+                "acquired": self._acquired,
+                "created": self._created,
+                "recycled": self._recycled,
+                "avg_wait_seconds": self._total_wait / self._acquired if self._acquired else 0.0,
+                "max_wait_seconds": self._max_wait,
+                "session_reuse_counts": dict(self._reuse_counts),
+            }
+
+    def close(self):
+        with self._available:
+            self._closed = True
+            idle = list(self._idle)
+            self._idle.clear()
+            self._available.notify_all()
+        for pooled in idle:
+            self._discard(pooled)
@@ -0,0 +1,271 @@
+"""
+Embedding service shared by the app threads, and optionally by several processes.
+
+Encode calls that arrive within BATCH_WINDOW seconds of each other are merged into
+one forward pass, and embeddings of recently seen strings come from an LRU cache.
+
+To keep a single copy of the model for all web workers, run the service in its
+own process and point the workers at it. Manager connections carry pickled
+objects, so the server and its clients must share a secret key:
+
+    export EMBEDDING_SERVICE_AUTHKEY=$(python -c "import secrets; print(secrets.token_hex(32))")
+    python embeddingService.py --address 127.0.0.1:50055
+    EMBEDDING_SERVICE_ADDRESS=127.0.0.1:50055 gunicorn app:app -w 4
+"""
+import argparse
+import ipaddress
+import os
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import Future
+from multiprocessing.managers import BaseManager
+from queue import Queue, Empty
+
+import numpy as np
+
+from tracing import stage
+
+EMBEDDING_MODEL = os.getenv("EMBEDDING_MODEL", "all-MiniLM-L6-v2")
+BATCH_WINDOW = float(os.getenv("EMBEDDING_BATCH_WINDOW", "0.005"))
+MAX_BATCH = int(os.getenv("EMBEDDING_MAX_BATCH", "64"))
+CACHE_SIZE = int(os.getenv("EMBEDDING_CACHE_SIZE", "4096"))
+SERVICE_ADDRESS = os.getenv("EMBEDDING_SERVICE_ADDRESS", "")
+# Shared secret for the manager connection; there is deliberately no default
+SERVICE_AUTHKEY = os.getenv("EMBEDDING_SERVICE_AUTHKEY", "")
+MIN_AUTHKEY_LENGTH = 16
+
+
+def load_model(name=EMBEDDING_MODEL):
+    from sentence_transformers import SentenceTransformer
+    return SentenceTransformer(name)
+
+
+def _as_output(texts, vectors):
+    # SentenceTransformer returns a single vector for a single string
+    return vectors[0] if isinstance(texts, str) else vectors
+
+
+class EmbeddingService:
+    """
+    Drop-in for SentenceTransformer.encode that batches concurrent callers.
+
+    Callers put their uncached strings on a queue and wait on a future. One
+    batcher thread drains the queue for up to window seconds (or until
+    max_batch strings are waiting), encodes the distinct strings in one call
+    and hands each caller its rows.
+    """
+
+    def __init__(self, model=None, window=BATCH_WINDOW, max_batch=MAX_BATCH, cache_size=CACHE_SIZE):
+        self.model = model or load_model()
+        self.window = window
+        self.max_batch = max_batch
+        self.cache_size = cache_size
+
+        self._cache = OrderedDict()
+        self._lock = threading.Lock()
+        self._queue = Queue()
+        threading.Thread(target=self._run, name="embedding-batcher", daemon=True).start()
+
+        self.requests = 0
+        self.batches = 0
+        self.encoded = 0
+        self.hits = 0
+        self.misses = 0
+
+    def encode(self, sentences, batch_size=None, convert_to_numpy=True, show_progress_bar=False, **kwargs):
+        return _as_output(sentences, self.embed([sentences] if isinstance(sentences, str) else sentences))
+
+    def embed(self, texts):
+        """
+        Embeds a list of strings. Returns a 2-D float32 array, one row per text.
+        """
+        texts = list(texts)
+        if not texts:
+            return np.zeros((0, 0), dtype=np.float32)
+
+        rows = [None] * len(texts)
+        missing = []
+        with self._lock:
+            self.requests += 1
+            for i, text in enumerate(texts):
+                vector = self._cache.get(text)
+                if vector is None:
+                    missing.append(i)
+                else:
+                    self._cache.move_to_end(text)
+                    rows[i] = vector
+            self.hits += len(texts) - len(missing)
+            self.misses += len(missing)
+
+        if missing:
+            with stage("encode") as span:
+                span.add("texts", len(missing))
+                future = Future()
+                self._queue.put(([texts[i] for i in missing], future))
+                for i, vector in zip(missing, future.result()):
+                    rows[i] = vector
+        return np.stack(rows)
+
+    def _collect(self):
+        batch = [self._queue.get()]
+        size = len(batch[0][0])
+        deadline = time.monotonic() + self.window
+        while size < self.max_batch:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                item = self._queue.get(timeout=remaining)
+            except Empty:
+                break
+            batch.append(item)
+            size += len(item[0])
+        return batch
+
+    def _run(self):
+        while True:
+            batch = self._collect()
+            distinct = list(dict.fromkeys(text for texts, _ in batch for text in texts))
+            try:
+                vectors = self.model.encode(
+                    distinct,
+                    batch_size=self.max_batch,
+                    convert_to_numpy=True,
+                    show_progress_bar=False,
+                )
+            except Exception as e:
+                for _, future in batch:
+                    future.set_exception(e)
+                continue
+
+            by_text = {}
+            for text, vector in zip(distinct, vectors):
+                vector.setflags(write=False)
+                by_text[text] = vector
+
+            with self._lock:
+                self.batches += 1
+                self.encoded += len(distinct)
+                for text, vector in by_text.items():
+                    self._cache[text] = vector
+                    self._cache.move_to_end(text)
+                while len(self._cache) > self.cache_size:
+                    self._cache.popitem(last=False)
+
+            for texts, future in batch:
+                future.set_result([by_text[text] for text in texts])
+
+    def stats(self):
+        with self._lock:
+            return {
+                "requests": self.requests,
+                "batches": self.batches,
+                "encoded": self.encoded,
+                "avg_batch_size": self.encoded / self.batches if self.batches else 0.0,
+                "cache_hits": self.hits,
+                "cache_misses": self.misses,
+                "cache_entries": len(self._cache),
+            }
+
+
+class EmbeddingManager(BaseManager):
+    pass
+
+
+def service_authkey(authkey=None):
+    """
+    The configured key as bytes. Anyone holding it can run code in the service
+    process (managers unpickle what they receive), so a missing or short key is
+    refused rather than replaced by a default.
+    """
+    authkey = SERVICE_AUTHKEY if authkey is None else authkey
+    if len(authkey) < MIN_AUTHKEY_LENGTH:
+        raise RuntimeError(
+            f"EMBEDDING_SERVICE_AUTHKEY must be set to a random secret of at least "
+            f"{MIN_AUTHKEY_LENGTH} characters, shared by the service and its clients"
+        )
+    return authkey.encode() if isinstance(authkey, str) else authkey
+
+
+class RemoteEmbedder:
+    """
+    Client for an EmbeddingService running in another process. Manager proxies
+    keep one connection per thread, so concurrent threads still batch together
+    on the server.
+    """
+
+    def __init__(self, address=SERVICE_ADDRESS, authkey=None):
+        EmbeddingManager.register("get_service")
+        self.manager = EmbeddingManager(address=parse_address(address), authkey=service_authkey(authkey))
+        self.manager.connect()
+        self.service = self.manager.get_service()
+
+    def encode(self, sentences, batch_size=None, convert_to_numpy=True, show_progress_bar=False, **kwargs):
+        return _as_output(sentences, self.embed([sentences] if isinstance(sentences, str) else sentences))
+
+    def embed(self, texts):
+        texts = list(texts)
+        with stage("encode", mode="remote") as span:
+            span.add("texts", len(texts))
+            return self.service.embed(texts)
+
+    def stats(self):
+        return self.service.stats()
+
+
+def parse_address(address):
+    host, _, port = address.rpartition(":")
+    return (host or "127.0.0.1", int(port))
+
+
+def is_loopback(host):
+    if host == "localhost":
+        return True
+    try:
+        return ipaddress.ip_address(host).is_loopback
+    except ValueError:
+        return False
+
+
+def open_embedder():
+    """
+    Connects to the shared embedding process when EMBEDDING_SERVICE_ADDRESS is
+    set, otherwise loads the model in this process.
+    """
+    if SERVICE_ADDRESS:
+        return RemoteEmbedder()
+    return EmbeddingService()
+
+
+def serve(address, authkey=None, allow_remote=False):
+    """
+    Serves the model on address. Binding beyond loopback also needs allow_remote,
+    since the key is then the only thing between the network and the process.
+    """
+    authkey = service_authkey(authkey)
+    host, port = parse_address(address)
+    if not is_loopback(host) and not allow_remote:
+        raise SystemExit(f"❌ Refusing to listen on {host}; pass --allow-remote to accept non-local clients")
+
+    service = EmbeddingService()
+    EmbeddingManager.register("get_service", callable=lambda: service, exposed=("embed", "stats"))
+    manager = EmbeddingManager(address=(host, port), authkey=authkey)
+    print(f"✅ Embedding service ({EMBEDDING_MODEL}) listening on {address}")
+    manager.get_server().serve_forever()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Shared embedding service")
+    parser.add_argument("--address", default=SERVICE_ADDRESS or "127.0.0.1:50055")
+    parser.add_argument("--allow-remote", action="store_true",
+                        help="Allow listening on a non-loopback address")
+    args = parser.parse_args()
+    try:
+        serve(args.address, allow_remote=args.allow_remote)
+    except RuntimeError as e:
+        raise SystemExit(f"❌ {e}")
+
+
+if __name__ == "__main__":
+    main()
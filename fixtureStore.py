@@ -0,0 +1,223 @@
+"""
+Offline replay backend for the scrapers.
+
+With SCRAPER_MODE=replay the HTTP fetchers and the browser pool serve pages
+stored in the repository instead of touching the network, so scraping and
+benchmarks run offline and deterministically. The routed pages
+(booking_search_results.html, booking_hotel_detail.html,
+kayak_flight_results.html) are synthetic: hand-written to mirror the selectors
+the scrapers read, not copies of Booking's or Kayak's current markup, so they
+cannot catch changes on those sites. The captured bot-check pages
+(booking_search.html, debug_output.html) are kept for parser benchmarks.
+"""
+import os
+import threading
+from contextlib import contextmanager
+
+import requests
+from bs4 import BeautifulSoup
+from selenium.common.exceptions import NoSuchElementException
+
+SCRAPER_MODE = os.getenv("SCRAPER_MODE", "live")
+FIXTURE_DIR = os.getenv("FIXTURE_DIR", os.path.dirname(os.path.abspath(__file__)))
+
+# First matching URL fragment wins
+ROUTES = [
+    ("booking.com/searchresults", "booking_search_results.html"),
+    ("booking.com/hotel/", "booking_hotel_detail.html"),
+    ("kayak.com/flights/", "kayak_flight_results.html"),
+    ("kayak.com", "kayak_debug.html"),
+]
+
+
+def replay_enabled():
+    return SCRAPER_MODE == "replay"
+
+
+class FixtureStore:
+    def __init__(self, directory=FIXTURE_DIR, routes=ROUTES):
+        self.directory = directory
+        self.routes = list(routes)
+        self._pages = {}
+        self._lock = threading.Lock()
+        self.served = 0
+        self.unmatched = 0
+
+    def fixture_for(self, url):
+        for fragment, filename in self.routes:
+            if fragment in url:
+                return filename
+        return None
+
+    def page(self, url):
+        """
+        Recorded HTML for a URL, or None when no fixture covers it.
+        """
+        filename = self.fixture_for(url)
+        if filename is None:
+            self.unmatched += 1
+            return None
+        with self._lock:
+            if filename not in self._pages:
+                with open(os.path.join(self.directory, filename), encoding="utf-8") as f:
+                    self._pages[filename] = f.read()
+            self.served += 1
+            return self._pages[filename]
+
+
+class ReplayResponse:
+    def __init__(self, url, text):
+        self.url = url
+        self.text = text or ""
+        self.status_code = 200 if text is not None else 404
+
+    def raise_for_status(self):
+        if self.status_code != 200:
+            raise requests.HTTPError(f"No fixture for {self.url}")
+
+
+class ReplaySession:
+    """
+    Stands in for requests.Session.
+    """
+
+    def __init__(self, store):
+        self.store = store
+        self.headers = {}
+
+    def get(self, url, **kwargs):
+        return ReplayResponse(url, self.store.page(url))
+
+    def mount(self, prefix, adapter):
+        pass
+
+    def close(self):
+        pass
+
+
+class ReplayElement:
+    def __init__(self, tag):
+        self.tag = tag
+
+    @property
+    def text(self):
+        return self.tag.get_text(" ", strip=True)
+
+    def get_attribute(self, name):
+        return self.tag.get(name)
+
+    def click(self):
+        pass
+
+    def find_elements(self, by, value):
+        return [ReplayElement(t) for t in self.tag.select(value)]
+
+    def find_element(self, by, value):
+        found = self.tag.select_one(value)
+        if found is None:
+            raise NoSuchElementException(value)
+        return ReplayElement(found)
+
+
+class ReplayDriver:
+    """
+    The subset of the Selenium WebDriver API the scrapers use, backed by fixtures.
+    Only CSS selectors are supported.
+    """
+
+    # Tells pageWait to check selectors once instead of polling
+    replay = True
+
+    def __init__(self, store):
+        self.store = store
+        self.current_url = "about:blank"
+        self.page_source = ""
+        self.window_handles = ["replay"]
+        self._soup = None
+
+    @property
+    def switch_to(self):
+        return self
+
+    def window(self, handle):
+        pass
+
+    def set_page_load_timeout(self, seconds):
+        pass
+
+    def get(self, url):
+        self.current_url = url
+        self.page_source = self.store.page(url) or ""
+        self._soup = None
+
+    def _document(self):
+        if self._soup is None:
+            self._soup = BeautifulSoup(self.page_source, "html.parser")
+        return self._soup
+
+    def find_elements(self, by, value):
+        return [ReplayElement(t) for t in self._document().select(value)]
+
+    def find_element(self, by, value):
+        found = self._document().select_one(value)
+        if found is None:
+            raise NoSuchElementException(value)
+        return ReplayElement(found)
+
+    def delete_all_cookies(self):
+        pass
+
+    def close(self):
+        pass
+
+    def quit(self):
+        pass
+
+
+class ReplayDriverPool:
+    """
+    Drop-in for driverPool.DriverPool that hands out fixture-backed drivers.
+    """
+
+    def __init__(self, store, max_size=3):
+        self.store = store
+        self.max_size = max_size
+        self._lock = threading.Lock()
+        self._acquired = 0
+
+    @contextmanager
+    def session(self, timeout=None):
+        with self._lock:
+            self._acquired += 1
+        yield ReplayDriver(self.store)
+
+    def stats(self):
+        return {
+            "mode": "replay",
+            "max_size": self.max_size,
+            "acquired": self._acquired,
+            "fixtures_served": self.store.served,
+            "unmatched_urls": self.store.unmatched,
+        }
+
+    def close(self):
+        pass
+
+
+_store = None
+
+
+def get_store():
+    global _store
+    if _store is None:
+        _store = FixtureStore()
+    return _store
+
+
+def http_get(url, **kwargs):
+    """
+    requests.get, or a recorded response when replay mode is on.
+    """
+    if replay_enabled():
+        return ReplaySession(get_store()).get(url, **kwargs)
+    return requests.get(url, **kwargs)
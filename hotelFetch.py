@@ -0,0 +1,189 @@
+"""
+Tiered Booking.com search fetcher.
+
+The search page is first fetched with a pooled requests.Session and the
+property cards are parsed from the static HTML with the fastest available
+parser (selectolax, then lxml, then BeautifulSoup). Callers escalate to a
+headless browser only when the static HTML has no cards.
+"""
+import re
+from urllib.parse import quote_plus
+
+import requests
+from requests.adapters import HTTPAdapter
+from bs4 import BeautifulSoup
+
+from fixtureStore import replay_enabled, get_store, ReplaySession
+from tracing import stage
+
+try:
+    from selectolax.parser import HTMLParser
+except ImportError:
+    HTMLParser = None
+
+try:
+    import lxml.html
+except ImportError:
+    lxml = None
+
+HEADERS = {
+    "User-Agent": (
+        "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 "
+        "(KHTML, like Gecko) Chrome/122.0.0.0 Safari/537.36"
+    ),
+    "Accept-Language": "en-US,en;q=0.9",
+}
+FETCH_TIMEOUT = 10
+# The card attribute itself; "property-card" alone also appears in class names
+# (map-modal--property-card-optimised) on bot-check pages
+CARD_MARKER = re.compile(r"""data-testid=["']property-card["']""")
+
+if replay_enabled():
+    _session = ReplaySession(get_store())
+else:
+    _session = requests.Session()
+    _session.headers.update(HEADERS)
+    _adapter = HTTPAdapter(pool_connections=4, pool_maxsize=16)
+    _session.mount("https://", _adapter)
+    _session.mount("http://", _adapter)
+
+
+def search_url(destination):
+    return f"https://www.booking.com/searchresults.html?ss={quote_plus(destination)}"
+
+
+def _selectolax_cards(page, limit):
+    tree = HTMLParser(page)
+
+    def text(node, selector):
+        found = node.css_first(selector)
+        return found.text(strip=True) if found else ""
+
+    for card in tree.css("div[data-testid='property-card']")[:limit]:
+        score = desc = ""
+        review = card.css_first("div[data-testid='review-score']")
+        if review:
+            divs = [child for child in review.iter() if child.tag == "div"]
+            score = divs[0].text(strip=True) if len(divs) > 0 else ""
+            desc = divs[1].text(strip=True) if len(divs) > 1 else ""
+        link = card.css_first("a[data-testid='title-link']")
+        yield {
+            "name": text(card, "div[data-testid='title']"),
+            "address": text(card, "span[data-testid='address']"),
+            "score": score,
+            "score_desc": desc,
+            "href": (link.attributes.get("href") or "") if link else "",
+            "price": text(card, "span[data-testid='price-and-discounted-price']"),
+        }
+
+
+def _lxml_cards(page, limit):
+    tree = lxml.html.fromstring(page)
+
+    def text(node, xpath):
+        found = node.xpath(xpath)
+        return "".join(found[0].itertext()).strip() if found else ""
+
+    for card in tree.xpath("//div[@data-testid='property-card']")[:limit]:
+        score = desc = ""
+        review = card.xpath(".//div[@data-testid='review-score']")
+        if review:
+            divs = review[0].xpath("./div")
+            score = "".join(divs[0].itertext()).strip() if len(divs) > 0 else ""
+            desc = "".join(divs[1].itertext()).strip() if len(divs) > 1 else ""
+        link = card.xpath(".//a[@data-testid='title-link']")
+        yield {
+            "name": text(card, ".//div[@data-testid='title']"),
+            "address": text(card, ".//span[@data-testid='address']"),
+            "score": score,
+            "score_desc": desc,
+            "href": link[0].get("href", "") if link else "",
+            "price": text(card, ".//span[@data-testid='price-and-discounted-price']"),
+        }
+
+
+def _bs4_cards(page, limit, features="html.parser"):
+    soup = BeautifulSoup(page, features)
+
+    def text(node, selector):
+        found = node.select_one(selector)
+        return found.get_text(strip=True) if found else ""
+
+    for card in soup.select("div[data-testid='property-card']")[:limit]:
+        score = desc = ""
+        review = card.select_one("div[data-testid='review-score']")
+        if review:
+            score = text(review, "div:nth-child(1)")
+            desc = text(review, "div:nth-child(2)")
+        link = card.select_one("a[data-testid='title-link']")
+        yield {
+            "name": text(card, "div[data-testid='title']"),
+            "address": text(card, "span[data-testid='address']"),
+            "score": score,
+            "score_desc": desc,
+            "href": link.get("href", "") if link else "",
+            "price": text(card, "span[data-testid='price-and-discounted-price']"),
+        }
+
+
+PARSERS = {"bs4": _bs4_cards}
+if lxml is not None:
+    PARSERS["bs4-lxml"] = lambda page, limit: _bs4_cards(page, limit, "lxml")
+    PARSERS["lxml"] = _lxml_cards
+if HTMLParser is not None:
+    PARSERS["selectolax"] = _selectolax_cards
+
+DEFAULT_PARSER = "selectolax" if HTMLParser else ("lxml" if lxml else "bs4")
+
+
+def _build_hotel(raw, destination, start_date, end_date):
+    href = raw["href"]
+    if href:
+        base_url = href.split("?")[0]
+        if not base_url.startswith("http"):
+            base_url = "https://www.booking.com" + base_url
+        url = f"{base_url}?checkin={start_date}&checkout={end_date}" if start_date and end_date else base_url
+    else:
+        url = ""
+
+    return {
+        "type": "hotel",
+        "name": raw["name"] or "N/A",
+        "url": url,
+        "location": raw["address"] or destination,
+        "price_per_night": raw["price"] or "N/A",
+        "rating": " / ".join(filter(None, [raw["score"], raw["score_desc"]])) or "N/A",
+    }
+
+
+def parse_property_cards(page, destination, start_date=None, end_date=None, limit=5, parser=None):
+    """
+    Extracts up to limit hotels from a Booking.com search results page.
+    """
+    # Pages without cards (bot checks, empty searches) skip the parse entirely
+    if not CARD_MARKER.search(page):
+        return []
+    with stage("parse", source="booking") as span:
+        cards = PARSERS[parser or DEFAULT_PARSER](page, limit)
+        hotels = [_build_hotel(raw, destination, start_date, end_date) for raw in cards]
+        span.add("cards", len(hotels))
+    return hotels
+
+
+def fetch_hotels_static(destination, start_date=None, end_date=None, limit=5):
+    """
+    Fast path: plain HTTP fetch of the search page. Returns None when the static
+    HTML has no property cards and the caller should fall back to a browser.
+    """
+    try:
+        with stage("fetch", source="booking_static") as span:
+            response = _session.get(search_url(destination), timeout=FETCH_TIMEOUT)
+            span.add("page_chars", len(response.text))
+    except requests.RequestException as e:
+        print("Static hotel fetch failed:", e)
+        return None
+
+    if response.status_code != 200:
+        return None
+    hotels = parse_property_cards(response.text, destination, start_date, end_date, limit)
+    return hotels or None
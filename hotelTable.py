@@ -0,0 +1,96 @@
+"""
+Column-oriented hotel listings per destination, so budget and rating filters run
+as NumPy operations instead of being left to the LLM.
+"""
+import threading
+from collections import OrderedDict
+
+import numpy as np
+
+from ingest import normalize_location, hotel_numeric_fields
+
+MAX_DESTINATIONS = 128
+
+
+class HotelTable:
+    """
+    One destination's hotels held as parallel arrays. Missing prices and ratings
+    are NaN, so they never pass a filter and sort last.
+    """
+
+    def __init__(self, records, texts):
+        self.records = list(records)
+        self.texts = np.array(texts, dtype=object)
+
+        prices, currencies, ratings = [], [], []
+        for record in self.records:
+            # Documents indexed before numeric fields existed are parsed here
+            fields = record if "price_value" in record or "rating_value" in record else hotel_numeric_fields(record)
+            prices.append(fields.get("price_value", np.nan))
+            currencies.append(fields.get("currency") or "")
+            ratings.append(fields.get("rating_value", np.nan))
+
+        self.price = np.array(prices, dtype=np.float64)
+        self.currency = np.array(currencies, dtype="<U3")
+        self.rating = np.array(ratings, dtype=np.float64)
+
+    def __len__(self):
+        return len(self.records)
+
+    def select(self, max_price=None, min_rating=None, currency=None, sort_by="price", limit=None):
+        """
+        Indices of rows within budget and rating, cheapest first (or best rated
+        first with sort_by="rating"). A currency restricts the budget comparison
+        to prices in that currency.
+        """
+        mask = np.ones(len(self), dtype=bool)
+        if max_price is not None:
+            mask &= self.price <= max_price
+            if currency:
+                mask &= self.currency == currency
+        if min_rating is not None:
+            mask &= self.rating >= min_rating
+
+        rows = np.flatnonzero(mask)
+        if sort_by == "rating":
+            order = np.argsort(-self.rating[rows], kind="stable")
+        else:
+            order = np.argsort(self.price[rows], kind="stable")
+        rows = rows[order]
+        return rows[:limit] if limit is not None else rows
+
+
+class HotelStore:
+    """
+    HotelTables keyed by normalized destination, least recently used dropped first.
+    """
+
+    def __init__(self, max_destinations=MAX_DESTINATIONS):
+        self.max_destinations = max_destinations
+        self._tables = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, location):
+        key = normalize_location(location)
+        with self._lock:
+            table = self._tables.get(key)
+            if table is not None:
+                self._tables.move_to_end(key)
+            return table
+
+    def put(self, location, records, texts):
+        table = HotelTable(records, texts)
+        key = normalize_location(location)
+        with self._lock:
+            self._tables[key] = table
+            self._tables.move_to_end(key)
+            while len(self._tables) > self.max_destinations:
+                self._tables.popitem(last=False)
+        return table
+
+    def invalidate(self, location=None):
+        with self._lock:
+            if location is None:
+                self._tables.clear()
+            else:
+                self._tables.pop(normalize_location(location), None)
@@ -0,0 +1,350 @@
+"""
+Shared indexing path for scraped hotels and flights.
+
+Document ids are derived from what a listing is (hotel name and location, or
+flight route, date and time), so rescrapes overwrite instead of piling up. Only
+new or changed documents are embedded, in a single batched encode call, and
+written to Chroma with one upsert (split only at Chroma's maximum batch size).
+Listings not seen for LISTING_MAX_AGE seconds are removed by compact_collection.
+Compaction runs from one process rather than from every web worker:
+
+    python ingest.py                  # one pass, e.g. from cron
+    python ingest.py --interval 3600  # keep compacting every hour
+"""
+import argparse
+import hashlib
+import os
+import re
+import threading
+import time
+
+from tracing import stage
+
+ENCODE_BATCH_SIZE = 64
+LISTING_MAX_AGE = float(os.getenv("LISTING_MAX_AGE", str(3 * 24 * 3600)))
+COMPACTION_INTERVAL = float(os.getenv("COMPACTION_INTERVAL", "3600"))
+COMPACTION_PAGE_SIZE = 1000
+
+# Longest symbols first so "US$" is not read as "$"
+CURRENCY_SYMBOLS = [
+    ("US$", "USD"), ("CA$", "CAD"), ("AU$", "AUD"), ("NZ$", "NZD"), ("HK$", "HKD"),
+    ("R$", "BRL"), ("S$", "SGD"), ("$", "USD"), ("€", "EUR"), ("£", "GBP"),
+    ("¥", "JPY"), ("₹", "INR"), ("₩", "KRW"), ("฿", "THB"),
+]
+CURRENCY_CODE_RE = re.compile(r"\b([A-Z]{3})\b")
+AMOUNT_RE = re.compile(r"\d[\d,.]*")
+SCORE_RE = re.compile(r"\d{1,2}(?:[.,]\d+)?")
+
+
+def normalize_location(location):
+    """
+    Canonical form of a place name used for metadata keys: "  New  York" -> "new york".
+    """
+    return " ".join((location or "").lower().split())
+
+
+def hotel_to_text(item):
+    return (
+        f"Hotel {item['name']} in {item['location']} costs {item['price_per_night']} "
+        f"per night with rating {item['rating']}."
+    )
+
+
+def flight_to_text(item):
+    return (
+        f"Flight by {item['airline']} from {item['route']} on {item['date']} "
+        f"departing at {item['time']} priced at {item['price']}."
+    )
+
+
+def parse_amount(text):
+    """
+    "1,234" -> 1234.0, "1.234" -> 1234.0 (thousands), "182.50" -> 182.5.
+    """
+    text = text.rstrip(".,")
+    if re.fullmatch(r"\d{1,3}(?:\.\d{3})+", text):
+        text = text.replace(".", "")
+    try:
+        return float(text.replace(",", ""))
+    except ValueError:
+        return None
+
+
+def parse_price(text):
+    """
+    Parses a displayed price into (amount, currency). Discounted prices list the
+    original first, so the last amount wins: "US$250 US$182" -> (182.0, "USD").
+    Returns (None, None) for "N/A", "pending" and other non-prices.
+    """
+    if not text:
+        return None, None
+    amounts = AMOUNT_RE.findall(str(text))
+    if not amounts:
+        return None, None
+    amount = parse_amount(amounts[-1])
+
+    currency = None
+    for symbol, code in CURRENCY_SYMBOLS:
+        if symbol in text:
+            currency = code
+            break
+    if currency is None:
+        match = CURRENCY_CODE_RE.search(str(text))
+        currency = match.group(1) if match else None
+    return amount, currency
+
+
+def parse_rating(text):
+    """
+    First score on Booking's 0-10 scale: "8.4 / Very good" -> 8.4, "Scored 9,1" -> 9.1.
+    """
+    if not text:
+        return None
+    for match in SCORE_RE.findall(str(text)):
+        score = float(match.replace(",", "."))
+        if 0 <= score <= 10:
+            return score
+    return None
+
+
+def hotel_numeric_fields(item):
+    """
+    price_value, currency and rating_value parsed from a hotel's display strings.
+    Unparseable fields are left out, since Chroma metadata cannot hold None.
+    """
+    fields = {}
+    amount, currency = parse_price(item.get("price_per_night"))
+    if amount is not None:
+        fields["price_value"] = amount
+    if currency:
+        fields["currency"] = currency
+    rating = parse_rating(item.get("rating"))
+    if rating is not None:
+        fields["rating_value"] = rating
+    return fields
+
+
+def content_hash(text):
+    return hashlib.sha1(text.encode("utf-8")).hexdigest()
+
+
+def stable_id(doc_type, *parts):
+    """
+    Id that stays the same across scrapes of the same listing.
+    """
+    key = "\x1f".join(normalize_location(str(part)) for part in parts)
+    return f"{doc_type}_{content_hash(key)[:20]}"
+
+
+def _max_batch_size(collection):
+    try:
+        return collection._client.get_max_batch_size()
+    except Exception:
+        return 5000
+
+
+def _chunks(items, size):
+    for start in range(0, len(items), size):
+        yield items[start:start + size]
+
+
+def _stored_hashes(collection, ids, step):
+    hashes = {}
+    for chunk in _chunks(ids, step):
+        existing = collection.get(ids=chunk, include=["metadatas"])
+        for doc_id, meta in zip(existing["ids"], existing["metadatas"]):
+            hashes[doc_id] = (meta or {}).get("content_hash")
+    return hashes
+
+
+def index_documents(collection, embedder, texts, ids, metadatas):
+    """
+    Upserts documents by id, embedding only texts that are new or changed since
+    they were last stored. Unchanged documents just get their metadata (and so
+    scraped_at) refreshed. Returns the number of documents embedded.
+    """
+    if not texts:
+        return 0
+
+    # A listing repeated within one scrape keeps its last version
+    latest = {}
+    for doc_id, text, meta in zip(ids, texts, metadatas):
+        latest[doc_id] = (text, dict(meta, content_hash=content_hash(text)))
+    ids = list(latest)
+
+    step = _max_batch_size(collection)
+    stored = _stored_hashes(collection, ids, step)
+    changed, unchanged = [], []
+    for doc_id in ids:
+        if stored.get(doc_id) == latest[doc_id][1]["content_hash"]:
+            unchanged.append(doc_id)
+        else:
+            changed.append(doc_id)
+
+    with stage("index") as span:
+        span.add("docs_unchanged", len(unchanged))
+        span.add("docs_embedded", len(changed))
+        for chunk in _chunks(unchanged, step):
+            collection.update(ids=chunk, metadatas=[latest[doc_id][1] for doc_id in chunk])
+
+        if not changed:
+            return 0
+
+        embeddings = embedder.encode(
+            [latest[doc_id][0] for doc_id in changed],
+            batch_size=ENCODE_BATCH_SIZE,
+            convert_to_numpy=True,
+            show_progress_bar=False,
+        ).tolist()
+
+        for start in range(0, len(changed), step):
+            chunk = changed[start:start + step]
+            collection.upsert(
+                ids=chunk,
+                documents=[latest[doc_id][0] for doc_id in chunk],
+                embeddings=embeddings[start:start + step],
+                metadatas=[latest[doc_id][1] for doc_id in chunk],
+            )
+    return len(changed)
+
+
+def _with_index_fields(items, location_key):
+    """
+    Adds the fields retrieval filters on: normalized location and scrape time.
+    """
+    scraped_at = time.time()
+    return [
+        dict(item, location_key=location_key, scraped_at=item.get("scraped_at", scraped_at))
+        for item in items
+    ]
+
+
+def index_hotels(collection, embedder, hotels, location):
+    texts = [hotel_to_text(item) for item in hotels]
+    ids = [stable_id("hotel", location, item["name"]) for item in hotels]
+    metadatas = [
+        dict(item, **hotel_numeric_fields(item))
+        for item in _with_index_fields(hotels, normalize_location(location))
+    ]
+    index_documents(collection, embedder, texts, ids, metadatas)
+    return texts
+
+
+def index_flights(collection, embedder, flights, origin, destination):
+    texts = [flight_to_text(item) for item in flights]
+    ids = [
+        stable_id("flight", origin, destination, item["airline"], item["date"], item["time"])
+        for item in flights
+    ]
+    metadatas = [
+        dict(item, origin_key=normalize_location(origin))
+        for item in _with_index_fields(flights, normalize_location(destination))
+    ]
+    index_documents(collection, embedder, texts, ids, metadatas)
+    return texts
+
+
+def metadata_filter(location=None, doc_type=None):
+    """
+    Builds a Chroma where clause restricting results to a location and/or type.
+    """
+    clauses = []
+    if location:
+        clauses.append({"location_key": normalize_location(location)})
+    if doc_type:
+        clauses.append({"type": doc_type})
+    if not clauses:
+        return None
+    if len(clauses) == 1:
+        return clauses[0]
+    return {"$and": clauses}
+
+
+def compact_collection(collection, max_age=LISTING_MAX_AGE, page_size=COMPACTION_PAGE_SIZE):
+    """
+    Deletes listings whose scraped_at is older than max_age seconds. Documents
+    indexed before scraped_at was recorded are stamped with the current time
+    instead, so they age out normally unless a rescrape refreshes them.
+    Returns (deleted, backfilled).
+    """
+    now = time.time()
+    cutoff = now - max_age
+    expired = []
+    legacy_ids, legacy_metas = [], []
+    offset = 0
+    while True:
+        page = collection.get(include=["metadatas"], limit=page_size, offset=offset)
+        if not page["ids"]:
+            break
+        for doc_id, meta in zip(page["ids"], page["metadatas"]):
+            meta = meta or {}
+            if "scraped_at" not in meta:
+                legacy_ids.append(doc_id)
+                legacy_metas.append(dict(meta, scraped_at=now))
+            elif meta["scraped_at"] < cutoff:
+                expired.append(doc_id)
+        offset += len(page["ids"])
+
+    step = _max_batch_size(collection)
+    for ids, metas in zip(_chunks(legacy_ids, step), _chunks(legacy_metas, step)):
+        collection.update(ids=ids, metadatas=metas)
+    for chunk in _chunks(expired, step):
+        collection.delete(ids=chunk)
+    return len(expired), len(legacy_ids)
+
+
+def run_compaction(collection, answer_cache=None, max_age=LISTING_MAX_AGE):
+    """
+    One compaction pass over the listings, plus the answer cache when given.
+    """
+    deleted, backfilled = compact_collection(collection, max_age)
+    if backfilled:
+        print(f"🕒 Compaction stamped {backfilled} listings that had no scraped_at")
+    if deleted:
+        print(f"🧹 Compaction removed {deleted} expired listings")
+    if answer_cache is not None:
+        answer_cache.purge_expired()
+
+
+def start_compactor(get_collection, interval=COMPACTION_INTERVAL, max_age=LISTING_MAX_AGE,
+                    get_answer_cache=None):
+    """
+    Runs run_compaction every interval seconds on a daemon thread, purging the
+    answer cache too when get_answer_cache is given. The collections are looked
+    up on each run, so starting the thread opens nothing. Start it in a single
+    process only. Returns an Event that stops the thread when set.
+    """
+    stop = threading.Event()
+
+    def run():
+        while not stop.wait(interval):
+            try:
+                answer_cache = get_answer_cache() if get_answer_cache is not None else None
+                run_compaction(get_collection(), answer_cache, max_age)
+            except Exception as e:
+                print(f"⚠️ Compaction failed: {e}")
+
+    threading.Thread(target=run, name="chroma-compactor", daemon=True).start()
+    return stop
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compact the listings collection and answer cache")
+    parser.add_argument("--interval", type=float, default=0,
+                        help=f"Repeat every N seconds (e.g. {COMPACTION_INTERVAL:g}); default runs once")
+    parser.add_argument("--max-age", type=float, default=LISTING_MAX_AGE)
+    args = parser.parse_args()
+
+    from resources import get_collection, get_answer_cache
+
+    run_compaction(get_collection(), get_answer_cache(), args.max_age)
+    if args.interval > 0:
+        stop = start_compactor(get_collection, args.interval, args.max_age, get_answer_cache)
+        try:
+            stop.wait()
+        except KeyboardInterrupt:
+            stop.set()
+
+
+if __name__ == "__main__":
+    main()
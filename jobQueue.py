@@ -0,0 +1,159 @@
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+
+QUEUED = "queued"
+RUNNING = "running"
+DONE = "done"
+FAILED = "failed"
+
+
+class QueueFull(Exception):
+    """
+    Raised by JobQueue.submit when max_pending jobs are already waiting to run.
+    """
+
+
+class Job:
+    def __init__(self, kind, key):
+        self.id = uuid.uuid4().hex
+        self.kind = kind
+        self.key = key
+        self.status = QUEUED
+        self.progress = "queued"
+        self.result = None
+        self.error = None
+        self.created_at = time.time()
+        self.started_at = None
+        self.finished_at = None
+        self._finished = threading.Event()
+
+    def set_progress(self, message):
+        self.progress = message
+
+    def is_active(self):
+        return self.status in (QUEUED, RUNNING)
+
+    def wait(self, timeout=None):
+        """
+        Blocks until the job has finished or timeout seconds pass. Returns True if it finished.
+        """
+        return self._finished.wait(timeout)
+
+    def to_dict(self):
+        return {
+            "job_id": self.id,
+            "kind": self.kind,
+            "status": self.status,
+            "progress": self.progress,
+            "result": self.result,
+            "error": self.error,
+            "created_at": self.created_at,
+            "started_at": self.started_at,
+            "finished_at": self.finished_at,
+        }
+
+
+class JobQueue:
+    """
+    Runs scrape and recommendation work on background threads.
+
+    Submitting a job whose key matches one that is still queued or running returns
+    the existing job, so concurrent identical requests share a single scrape.
+    Finished jobs are kept for history_ttl seconds so clients can poll for results.
+    At most max_pending new jobs wait for a worker; beyond that submit raises
+    QueueFull instead of queueing scrapes indefinitely.
+    """
+
+    def __init__(self, max_workers=4, history_ttl=15 * 60, max_pending=32):
+        self.history_ttl = history_ttl
+        self.max_pending = max_pending
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="job")
+        self._lock = threading.Lock()
+        self._jobs = {}
+        self._active_by_key = {}
+        self._pending = 0
+        self.submitted = 0
+        self.deduplicated = 0
+        self.rejected = 0
+
+    def submit(self, kind, key, fn):
+        """
+        Queues fn(job) unless an identical job is already in flight. Returns the
+        job, or raises QueueFull when too many jobs are waiting.
+        """
+        dedupe_key = (kind, key)
+        with self._lock:
+            self._purge_finished()
+            existing = self._active_by_key.get(dedupe_key)
+            if existing is not None and existing.is_active():
+                self.deduplicated += 1
+                return existing
+            if self._pending >= self.max_pending:
+                self.rejected += 1
+                raise QueueFull(f"{self._pending} jobs are already waiting")
+
+            job = Job(kind, key)
+            self._jobs[job.id] = job
+            self._active_by_key[dedupe_key] = job
+            self.submitted += 1
+            self._pending += 1
+
+        self._executor.submit(self._run, job, fn)
+        return job
+
+    def _run(self, job, fn):
+        with self._lock:
+            self._pending -= 1
+        job.status = RUNNING
+        job.started_at = time.time()
+        job.set_progress("running")
+        # finished_at is set before the status changes, since _purge_finished
+        # reads it for any job that is no longer active
+        try:
+            result = fn(job)
+        except Exception as e:
+            print(f"Job {job.kind} {job.id} failed:", e)
+            job.error = str(e)
+            job.finished_at = time.time()
+            job.status = FAILED
+            job.set_progress("failed")
+        else:
+            job.result = result
+            job.finished_at = time.time()
+            job.status = DONE
+            job.set_progress("done")
+        finally:
+            with self._lock:
+                if self._active_by_key.get((job.kind, job.key)) is job:
+                    del self._active_by_key[(job.kind, job.key)]
+            job._finished.set()
+
+    def _purge_finished(self):
+        cutoff = time.time() - self.history_ttl
+        expired = [
+            job_id for job_id, job in self._jobs.items()
+            if not job.is_active() and job.finished_at is not None and job.finished_at < cutoff
+        ]
+        for job_id in expired:
+            del self._jobs[job_id]
+
+    def get(self, job_id):
+        with self._lock:
+            return self._jobs.get(job_id)
+
+    def stats(self):
+        with self._lock:
+            statuses = {}
+            for job in self._jobs.values():
+                statuses[job.status] = statuses.get(job.status, 0) + 1
+            return {
+                "submitted": self.submitted,
+                "deduplicated": self.deduplicated,
+                "rejected": self.rejected,
+                "pending": self._pending,
+                "max_pending": self.max_pending,
+                "tracked": len(self._jobs),
+                "by_status": statuses,
+            }
@@ -0,0 +1,159 @@
+import json
+import os
+import threading
+import time
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from tracing import stage
+
+OLLAMA_HOST = os.getenv("OLLAMA_HOST", "http://localhost:11434")
+OLLAMA_MODEL = os.getenv("OLLAMA_MODEL", "llama3")
+# How long Ollama keeps the model loaded after a request, e.g. "30m" or -1 for forever
+OLLAMA_KEEP_ALIVE = os.getenv("OLLAMA_KEEP_ALIVE", "30m")
+OLLAMA_TIMEOUT = float(os.getenv("OLLAMA_TIMEOUT", "120"))
+
+
+class LLMError(Exception):
+    pass
+
+
+class OllamaClient:
+    """
+    Talks to the Ollama HTTP API over a pooled keep-alive session, so each prompt
+    reuses an open connection and an already-loaded model instead of forking
+    `ollama run`.
+    """
+
+    def __init__(self, host=OLLAMA_HOST, model=OLLAMA_MODEL, keep_alive=OLLAMA_KEEP_ALIVE,
+                 timeout=OLLAMA_TIMEOUT, pool_size=10):
+        self.host = host.rstrip("/")
+        self.model = model
+        self.keep_alive = keep_alive
+        self.timeout = timeout
+
+        self._stats_lock = threading.Lock()
+        self._requests = 0
+        self._streams = 0
+        self._ttft_total = 0.0
+        self._ttft_max = 0.0
+        self._ttft_last = 0.0
+        self._duration_total = 0.0
+
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_size)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+
+    def _payload(self, prompt, model, keep_alive, stream):
+        return {
+            "model": model or self.model,
+            "prompt": prompt,
+            "stream": stream,
+            "keep_alive": self.keep_alive if keep_alive is None else keep_alive,
+        }
+
+    def _record(self, duration, ttft=None):
+        """
+        Counts one request. Time to first token is only known for streamed requests.
+        """
+        with self._stats_lock:
+            self._requests += 1
+            self._duration_total += duration
+            if ttft is not None:
+                self._streams += 1
+                self._ttft_total += ttft
+                self._ttft_max = max(self._ttft_max, ttft)
+                self._ttft_last = ttft
+
+    def generate(self, prompt, model=None, timeout=None, keep_alive=None):
+        started = time.time()
+        with stage("llm", mode="generate") as span:
+            span.add("prompt_chars", len(prompt))
+            try:
+                response = self.session.post(
+                    f"{self.host}/api/generate",
+                    json=self._payload(prompt, model, keep_alive, stream=False),
+                    timeout=timeout or self.timeout,
+                )
+                response.raise_for_status()
+                body = response.json()
+                text = body.get("response", "").strip()
+            except (requests.RequestException, ValueError) as e:
+                raise LLMError(str(e)) from e
+            span.add("prompt_tokens", body.get("prompt_eval_count"))
+            span.add("completion_tokens", body.get("eval_count"))
+
+        self._record(time.time() - started)
+        return text
+
+    def stream(self, prompt, model=None, timeout=None, keep_alive=None):
+        """
+        Yields response fragments as the model produces them.
+        """
+        started = time.time()
+        first_token_at = None
+        with stage("llm", mode="stream") as span:
+            span.add("prompt_chars", len(prompt))
+            try:
+                with self.session.post(
+                    f"{self.host}/api/generate",
+                    json=self._payload(prompt, model, keep_alive, stream=True),
+                    timeout=timeout or self.timeout,
+                    stream=True,
+                ) as response:
+                    response.raise_for_status()
+                    for line in response.iter_lines():
+                        if not line:
+                            continue
+                        chunk = json.loads(line)
+                        if chunk.get("error"):
+                            raise LLMError(chunk["error"])
+                        token = chunk.get("response", "")
+                        if token:
+                            if first_token_at is None:
+                                first_token_at = time.time()
+                            yield token
+                        if chunk.get("done"):
+                            # The final chunk carries Ollama's token counts
+                            span.add("prompt_tokens", chunk.get("prompt_eval_count"))
+                            span.add("completion_tokens", chunk.get("eval_count"))
+                            break
+            except (requests.RequestException, ValueError) as e:
+                raise LLMError(str(e)) from e
+
+        finished = time.time()
+        self._record(finished - started, ttft=(first_token_at or finished) - started)
+
+    def stats(self):
+        with self._stats_lock:
+            count = self._requests
+            streams = self._streams
+            return {
+                "requests": count,
+                "streamed_requests": streams,
+                "avg_time_to_first_token_seconds": self._ttft_total / streams if streams else 0.0,
+                "max_time_to_first_token_seconds": self._ttft_max,
+                "last_time_to_first_token_seconds": self._ttft_last,
+                "avg_duration_seconds": self._duration_total / count if count else 0.0,
+            }
+
+    def close(self):
+        self.session.close()
+
+
+_client = None
+_client_lock = threading.Lock()
+
+
+def get_client():
+    """
+    Returns the process-wide Ollama client, creating it on first use.
+    """
+    global _client
+    if _client is None:
+        with _client_lock:
+            if _client is None:
+                _client = OllamaClient()
+    return _client
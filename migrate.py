@@ -0,0 +1,50 @@
+"""
+Applies the SQL files in migrations/ in order, once each.
+
+    python migrate.py
+"""
+import os
+
+from dbPool import get_pool
+
+MIGRATIONS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "migrations")
+
+
+def pending_migrations(applied):
+    for filename in sorted(os.listdir(MIGRATIONS_DIR)):
+        if filename.endswith(".sql") and filename not in applied:
+            yield filename
+
+
+def migrate(pool=None):
+    pool = pool or get_pool()
+    with pool.connection() as conn:
+        with conn.cursor() as cur:
+            cur.execute(
+                """
+                CREATE TABLE IF NOT EXISTS schema_migrations (
+                    filename TEXT PRIMARY KEY,
+                    applied_at TIMESTAMPTZ NOT NULL DEFAULT now()
+                )
+                """
+            )
+            cur.execute("SELECT filename FROM schema_migrations")
+            applied = {row[0] for row in cur.fetchall()}
+
+    ran = []
+    for filename in pending_migrations(applied):
+        with open(os.path.join(MIGRATIONS_DIR, filename), encoding="utf-8") as f:
+            sql = f.read()
+        # Each migration commits together with its bookkeeping row
+        with pool.connection() as conn:
+            with conn.cursor() as cur:
+                cur.execute(sql)
+                cur.execute("INSERT INTO schema_migrations (filename) VALUES (%s)", (filename,))
+        print(f"✅ Applied {filename}")
+        ran.append(filename)
+    return ran
+
+
+if __name__ == "__main__":
+    if not migrate():
+        print("Database is up to date.")
@@ -0,0 +1,12 @@
+-- Base trip table used by /api/trip/submit and tripSummary.py
+CREATE TABLE IF NOT EXISTS trip_requests (
+    id BIGSERIAL PRIMARY KEY,
+    name TEXT NOT NULL,
+    destination TEXT NOT NULL,
+    start_date DATE,
+    end_date DATE,
+    budget TEXT
+);
+
+-- Older databases created the table without a surrogate key; keyset pagination needs one
+ALTER TABLE trip_requests ADD COLUMN IF NOT EXISTS id BIGSERIAL;
@@ -0,0 +1,3 @@
+-- Per-traveller lookups and pagination in tripSummary.py filter on name and order by start_date, id
+CREATE INDEX IF NOT EXISTS trip_requests_name_start_date_idx
+    ON trip_requests (name, start_date, id);
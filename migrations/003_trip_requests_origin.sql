@@ -0,0 +1,4 @@
+-- Trips planned through /api/trip are stored here too; they carry an origin and may be anonymous
+ALTER TABLE trip_requests ADD COLUMN IF NOT EXISTS origin TEXT;
+ALTER TABLE trip_requests ADD COLUMN IF NOT EXISTS created_at TIMESTAMPTZ NOT NULL DEFAULT now();
+ALTER TABLE trip_requests ALTER COLUMN name DROP NOT NULL;
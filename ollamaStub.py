@@ -0,0 +1,100 @@
+"""
+Minimal stand-in for the Ollama HTTP API, for exercising the app without a model.
+
+    python ollamaStub.py --port 11434
+    OLLAMA_HOST=http://127.0.0.1:11434 python app.py
+"""
+import argparse
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+class StubHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, format, *args):
+        pass
+
+    def _reply(self, status, body, content_type="application/json"):
+        data = body.encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def do_POST(self):
+        if self.path != "/api/generate":
+            self._reply(404, json.dumps({"error": "not found"}))
+            return
+
+        length = int(self.headers.get("Content-Length", 0))
+        payload = json.loads(self.rfile.read(length) or b"{}")
+        self.server.requests.append(payload)
+
+        answer = self.server.answer_for(payload.get("prompt", ""))
+        if self.server.delay:
+            time.sleep(self.server.delay)
+
+        if not payload.get("stream", True):
+            self._reply(200, json.dumps({
+                "model": payload.get("model"),
+                "response": answer,
+                "done": True,
+            }))
+            return
+
+        tokens = answer.split(" ")
+        tokens = tokens[:1] + [" " + token for token in tokens[1:]]
+        lines = [
+            json.dumps({"model": payload.get("model"), "response": token, "done": False})
+            for token in tokens
+        ]
+        lines.append(json.dumps({"model": payload.get("model"), "response": "", "done": True}))
+        self._reply(200, "\n".join(lines) + "\n", content_type="application/x-ndjson")
+
+
+class StubServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, address, answer="This is a stub answer.", delay=0.0):
+        super().__init__(address, StubHandler)
+        self.answer = answer
+        self.delay = delay
+        self.requests = []
+
+    def answer_for(self, prompt):
+        return self.answer(prompt) if callable(self.answer) else self.answer
+
+    @property
+    def url(self):
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}"
+
+
+def start_stub_server(port=0, answer="This is a stub answer.", delay=0.0):
+    """
+    Starts the stub in a background thread; port 0 picks a free port.
+    Use server.url as OLLAMA_HOST and server.shutdown() when done.
+    """
+    server = StubServer(("127.0.0.1", port), answer=answer, delay=delay)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run a stub Ollama API server")
+    parser.add_argument("--port", type=int, default=11434)
+    parser.add_argument("--answer", default="This is a stub answer.")
+    parser.add_argument("--delay", type=float, default=0.0)
+    args = parser.parse_args()
+
+    server = StubServer(("127.0.0.1", args.port), answer=args.answer, delay=args.delay)
+    print(f"Stub Ollama listening on {server.url}")
+    server.serve_forever()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,82 @@
+import threading
+import time
+
+from selenium.common.exceptions import TimeoutException, WebDriverException
+from selenium.webdriver.common.by import By
+from selenium.webdriver.support.ui import WebDriverWait
+
+
+class ReadinessStats:
+    """
+    Records how long each kind of page took to become ready.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._pages = {}
+
+    def record(self, page, seconds, ready):
+        with self._lock:
+            entry = self._pages.setdefault(page, {
+                "count": 0,
+                "timeouts": 0,
+                "total_seconds": 0.0,
+                "max_seconds": 0.0,
+                "last_seconds": 0.0,
+            })
+            entry["count"] += 1
+            if not ready:
+                entry["timeouts"] += 1
+            entry["total_seconds"] += seconds
+            entry["max_seconds"] = max(entry["max_seconds"], seconds)
+            entry["last_seconds"] = seconds
+
+    def snapshot(self):
+        with self._lock:
+            result = {}
+            for page, entry in self._pages.items():
+                result[page] = dict(entry)
+                result[page]["avg_seconds"] = entry["total_seconds"] / entry["count"]
+            return result
+
+
+readiness_stats = ReadinessStats()
+
+
+def any_selector_present(selectors, require_text=False):
+    """
+    Expected condition that is satisfied by the first selector matching an element.
+    Selectors are CSS strings or (By, value) tuples.
+    """
+    locators = [s if isinstance(s, tuple) else (By.CSS_SELECTOR, s) for s in selectors]
+
+    def condition(driver):
+        for locator in locators:
+            for element in driver.find_elements(*locator):
+                if not require_text or element.text.strip():
+                    return element
+        return False
+
+    return condition
+
+
+def wait_for_any(driver, selectors, timeout, page="page", require_text=False, poll=0.25):
+    """
+    Waits until any of the selectors is present, sharing one deadline across all of
+    them. Returns the matching element, or None if nothing appeared in time.
+    """
+    started = time.time()
+    element = None
+    if getattr(driver, "replay", False):
+        # Recorded pages never change, so one check is as good as waiting
+        element = any_selector_present(selectors, require_text=require_text)(driver) or None
+    elif timeout > 0:
+        try:
+            element = WebDriverWait(driver, timeout, poll_frequency=poll).until(
+                any_selector_present(selectors, require_text=require_text)
+            )
+        except (TimeoutException, WebDriverException):
+            element = None
+
+    readiness_stats.record(page, time.time() - started, element is not None)
+    return element
@@ -0,0 +1,306 @@
+"""
+Pulls the travel intent out of a free-text question in one pass: origin,
+destination, dates, budget and minimum rating.
+
+    >>> parse_query("Cheap flights from SFO to New York next weekend under $300")
+    Query(intent='flight', origin='San Francisco', destination='New York', ...)
+
+A single precompiled pattern finds the cues ("from X", "to X", "in X", dates,
+"under $200", "rated 8+"). Place spans are then resolved against a gazetteer of
+the cities and IATA codes in airports.dat, keeping the longest known prefix, so
+"in Tokyo under" resolves to "Tokyo". When no cue names a place, a capitalized
+city anywhere in the text ("cheap Paris hotels") is taken as the destination.
+"""
+import re
+import threading
+from collections import namedtuple
+from datetime import date, timedelta
+
+from airportIndex import get_index, normalize, is_commercial
+from ingest import parse_price
+
+MONTHS = {
+    "jan": 1, "january": 1, "feb": 2, "february": 2, "mar": 3, "march": 3,
+    "apr": 4, "april": 4, "may": 5, "jun": 6, "june": 6, "jul": 7, "july": 7,
+    "aug": 8, "august": 8, "sep": 9, "sept": 9, "september": 9, "oct": 10,
+    "october": 10, "nov": 11, "november": 11, "dec": 12, "december": 12,
+}
+MONTH = "|".join(sorted(MONTHS, key=len, reverse=True))
+
+# Words that end a place name: "Paris next weekend", "Tokyo under $200"
+STOP_WORDS = (
+    "under|below|over|above|around|near|less|more|than|cheaper|cheap|cheapest|max|maximum|"
+    "budget|with|without|for|from|to|in|at|on|by|and|or|between|during|next|this|last|"
+    "tomorrow|today|tonight|weekend|week|rated|rating|score|scored|hotels?|flights?|stay|"
+    "please|up|of|the|a|an|" + MONTH
+)
+WORD = rf"(?!(?:{STOP_WORDS})\b)[A-Za-z][A-Za-z.'\-]*"
+PLACE = rf"{WORD}(?:\s+{WORD}){{0,4}}"
+MAX_PLACE_WORDS = 5
+# "up to 4 guests" is a head count, not a budget
+COUNT_NOUNS = (
+    "guests?|people|persons?|adults?|children|kids|travell?ers|pax|nights?|days?|weeks?|"
+    "rooms?|beds?|bedrooms?|stars?"
+)
+# Runs of capitalized words, for cities named without a cue: "cheap Paris hotels"
+CAPITALIZED_RUN = re.compile(r"\b[A-Z][A-Za-z.'\-]*(?:\s+[A-Z][A-Za-z.'\-]*)*")
+# Multi-airport city codes that are not airports themselves, so not in airports.dat
+METRO_CODES = {
+    "NYC": "New York", "LON": "London", "PAR": "Paris", "TYO": "Tokyo", "CHI": "Chicago",
+    "WAS": "Washington", "ROM": "Rome", "MIL": "Milan", "OSA": "Osaka", "SEL": "Seoul",
+    "STO": "Stockholm", "MOW": "Moscow", "BJS": "Beijing", "SAO": "Sao Paulo", "BUE": "Buenos Aires",
+}
+
+QUERY_PATTERN = re.compile(
+    rf"""
+      (?-i:\b(?P<code_origin>[A-Z]{{3}})\s*(?:to|-|→)\s*(?P<code_destination>[A-Z]{{3}})\b)
+    | \bfrom\s+(?P<route_origin>{PLACE})\s+to\s+(?P<route_destination>{PLACE})
+    | \bfrom\s+(?P<origin>{PLACE})
+    | \bto\s+(?P<destination>{PLACE})
+    | \b(?:in|at|near)\s+(?P<location>{PLACE})
+    | \b(?:for|visit|visiting)\s+(?P<mentioned>{PLACE})
+    | \b(?P<iso_date>\d{{4}}-\d{{2}}-\d{{2}})\b
+    | \b(?P<month>{MONTH})\.?\s+(?P<month_day>\d{{1,2}})(?:st|nd|rd|th)?
+        (?:\s*(?:-|–|to|until)\s*(?P<month_day_end>\d{{1,2}})(?:st|nd|rd|th)?)?
+        (?:,?\s+(?P<month_year>\d{{4}}))?\b
+    | \b(?P<day>\d{{1,2}})(?:st|nd|rd|th)?\s+(?P<day_month>{MONTH})\b(?:\s+(?P<day_year>\d{{4}}))?
+    | \b(?P<relative>tomorrow|today|tonight|this\s+weekend|next\s+weekend|next\s+week)\b
+    | \bfor\s+(?P<nights>\d{{1,2}})\s+(?:nights?|days?)\b
+    | \b(?:under|below|less\s+than|cheaper\s+than|at\s+most|up\s+to|max(?:imum)?|budget(?:\s+of)?)\s+
+        (?P<budget>[A-Z]{{0,2}}[$€£¥₹]?\s?\d[\d,.]*(?![\d,.])(?!\s*(?:{COUNT_NOUNS})\b)(?:\s?[A-Z]{{3}}\b)?)
+    | \b(?:rat(?:ed|ing)|score[d]?)\s*(?:of\s*)?(?:at\s+least|above|over|>=?)?\s*(?P<rating>\d{{1,2}}(?:\.\d)?)
+    | \b(?P<good_reviews>(?:good|great|excellent)\s+(?:reviews|ratings?)|(?:well|highly)\s+rated)\b
+    """,
+    re.IGNORECASE | re.VERBOSE,
+)
+FLIGHT_WORDS = re.compile(r"\b(?:flights?|fly|flying|airfares?|plane|airlines?)\b", re.IGNORECASE)
+HOTEL_WORDS = re.compile(r"\b(?:hotels?|stay|rooms?|accommodation|hostels?|resorts?)\b", re.IGNORECASE)
+GOOD_REVIEWS_RATING = 8.0
+
+
+class Query(namedtuple(
+    "Query",
+    "intent origin destination origin_code destination_code start_date end_date "
+    "max_price currency min_rating",
+)):
+    __slots__ = ()
+
+    @property
+    def location(self):
+        """
+        The place a hotel question is about.
+        """
+        return self.destination
+
+    def hotel_filters(self):
+        return {
+            field: getattr(self, field)
+            for field in ("max_price", "currency", "min_rating")
+            if getattr(self, field) is not None
+        }
+
+
+class Gazetteer:
+    """
+    Normalized city names and IATA codes from the airport index, for resolving
+    captured place spans.
+    """
+
+    def __init__(self, index):
+        self.index = index
+        self.cities = {}
+        for key, indices in index.by_city.items():
+            airports = [index.airports[i] for i in indices]
+            if key and any(is_commercial(a) for a in airports):
+                self.cities[key] = airports[0].city
+
+    def city_code(self, city):
+        airports = self.index.airports_for_city(city)
+        return airports[0].iata if airports else None
+
+    def resolve(self, span):
+        """
+        Longest known city at the start of span, as (city, iata_code), or None.
+        A span that is an IATA code resolves to that airport's city.
+        """
+        span = span.strip().rstrip(".'-")
+        words = span.split()
+        if span.upper() in METRO_CODES and normalize(span) not in self.cities:
+            city = METRO_CODES[span.upper()]
+            return city, self.city_code(city)
+        if len(words) == 1 and len(span) == 3 and span.isalpha():
+            airports = [a for a in self.index.by_iata(span) if is_commercial(a)]
+            if airports and (span.isupper() or normalize(span) not in self.cities):
+                return airports[0].city, airports[0].iata
+        city = self._longest_city(words)
+        return (city, self.city_code(city)) if city else None
+
+    def _longest_city(self, words):
+        for n in range(min(len(words), MAX_PLACE_WORDS), 0, -1):
+            city = self.cities.get(normalize(" ".join(words[:n])))
+            if city:
+                return city
+        return None
+
+    def find(self, text):
+        """
+        First known city named by capitalized words anywhere in text, as
+        (city, iata_code), or None. Codes are not matched here.
+        """
+        for match in CAPITALIZED_RUN.finditer(text):
+            words = match.group().split()
+            for start in range(len(words)):
+                city = self._longest_city(words[start:])
+                if city:
+                    return city, self.city_code(city)
+        return None
+
+
+_gazetteer = None
+_gazetteer_lock = threading.Lock()
+
+
+def get_gazetteer():
+    global _gazetteer
+    if _gazetteer is None:
+        with _gazetteer_lock:
+            if _gazetteer is None:
+                _gazetteer = Gazetteer(get_index())
+    return _gazetteer
+
+
+def _future_date(year, month, day, today):
+    """
+    A date without a year means the next occurrence of it.
+    """
+    try:
+        value = date(year or today.year, month, day)
+    except ValueError:
+        return None
+    if year is None and value < today:
+        try:
+            value = value.replace(year=today.year + 1)
+        except ValueError:
+            return None
+    return value
+
+
+def _relative_dates(phrase, today):
+    phrase = " ".join(phrase.lower().split())
+    if phrase in ("today", "tonight"):
+        return today, None
+    if phrase == "tomorrow":
+        return today + timedelta(days=1), None
+    if phrase == "next week":
+        monday = today + timedelta(days=7 - today.weekday())
+        return monday, monday + timedelta(days=6)
+    # This weekend is the coming Saturday and Sunday (or the current one, on a Sunday)
+    saturday = today + timedelta(days=(5 - today.weekday()) % 7)
+    if today.weekday() == 6:
+        saturday = today - timedelta(days=1)
+    if phrase == "next weekend":
+        saturday += timedelta(days=7)
+    return max(saturday, today), saturday + timedelta(days=1)
+
+
+def parse_query(text, today=None, gazetteer=None):
+    """
+    Parses a travel question into a Query. Fields that are not mentioned are None.
+    """
+    today = today or date.today()
+    gazetteer = gazetteer or get_gazetteer()
+    text = text or ""
+
+    places = {}
+    dates = []
+    nights = None
+    max_price = currency = min_rating = None
+
+    def place(role, span, allow_unknown):
+        if places.get(role):
+            return
+        resolved = gazetteer.resolve(span)
+        if resolved:
+            places[role] = resolved
+        elif allow_unknown:
+            places[role] = (span.strip(), None)
+
+    for match in QUERY_PATTERN.finditer(text):
+        group = match.lastgroup
+        found = match.groupdict()
+        if found["code_origin"]:
+            place("origin", found["code_origin"], False)
+            place("destination", found["code_destination"], False)
+        elif found["route_origin"]:
+            place("origin", found["route_origin"], True)
+            place("destination", found["route_destination"], True)
+        elif found["origin"]:
+            place("origin", found["origin"], False)
+        elif found["destination"]:
+            place("destination", found["destination"], False)
+        elif found["location"]:
+            place("location", found["location"], True)
+        elif found["mentioned"]:
+            place("location", found["mentioned"], False)
+        elif found["iso_date"]:
+            try:
+                dates.append(date.fromisoformat(found["iso_date"]))
+            except ValueError:
+                pass
+        elif found["month"]:
+            month = MONTHS[found["month"].lower()]
+            year = int(found["month_year"]) if found["month_year"] else None
+            start = _future_date(year, month, int(found["month_day"]), today)
+            if start:
+                dates.append(start)
+                if found["month_day_end"]:
+                    end = _future_date(start.year, month, int(found["month_day_end"]), start)
+                    if end:
+                        dates.append(end)
+        elif found["day"]:
+            year = int(found["day_year"]) if found["day_year"] else None
+            start = _future_date(year, MONTHS[found["day_month"].lower()], int(found["day"]), today)
+            if start:
+                dates.append(start)
+        elif found["relative"]:
+            dates.extend(d for d in _relative_dates(found["relative"], today) if d)
+        elif found["nights"]:
+            nights = int(found["nights"])
+        elif found["budget"] and max_price is None:
+            max_price, currency = parse_price(found["budget"])
+        elif found["rating"] and min_rating is None:
+            min_rating = float(found["rating"])
+        elif group == "good_reviews" and min_rating is None:
+            min_rating = GOOD_REVIEWS_RATING
+
+    # "in Paris" names the destination of a hotel question unless "to X" already did
+    destination = places.get("destination") or places.get("location")
+    origin = places.get("origin")
+    if not destination and not origin:
+        destination = gazetteer.find(text)
+
+    start_date = dates[0] if dates else None
+    end_date = dates[1] if len(dates) > 1 else None
+    if start_date and nights and not end_date:
+        end_date = start_date + timedelta(days=nights)
+
+    if FLIGHT_WORDS.search(text) or (origin and destination and not HOTEL_WORDS.search(text)):
+        intent = "flight"
+    elif HOTEL_WORDS.search(text) or destination:
+        # A place to go without an origin ("I want to go to Rome") is a stay there
+        intent = "hotel"
+    else:
+        intent = None
+
+    return Query(
+        intent=intent,
+        origin=origin[0] if origin else None,
+        destination=destination[0] if destination else None,
+        origin_code=origin[1] if origin else None,
+        destination_code=destination[1] if destination else None,
+        start_date=start_date.isoformat() if start_date else None,
+        end_date=end_date.isoformat() if end_date else None,
+        max_price=max_price,
+        currency=currency,
+        min_rating=min_rating,
+    )
@@ -1,31 +1,25 @@
-import chromadb
-from sentence_transformers import SentenceTransformer
-import subprocess
-import re
-
-# Initialize embedding model
-embedder = SentenceTransformer("all-MiniLM-L6-v2")
-
-# Initialize Chroma client
-chroma_client = chromadb.PersistentClient(path="./chromadb_persist")
-collection = chroma_client.get_or_create_collection(name="travel_data")
-
-# Simple keyword extraction with regex
-def extract_location(question):
+from llmClient import get_client, LLMError
+from ingest import index_hotels, metadata_filter
+from semanticCache import oldest_scraped_at, answer_variant
+from resources import get_embedder, get_collection, get_answer_cache
+from fixtureStore import http_get
+from hotelFetch import search_url
+from queryParser import parse_query
+from tracing import stage, traced, summary, ENABLED as TRACING_ENABLED
+
+
+@traced("retrieve")
+def retrieve_relevant_docs(query, top_k=3, query_embedding=None, location=None, doc_type=None):
     """
-    A very simple heuristic to extract location from the question.
-    You can replace this with spaCy or a better NLP library.
+    Nearest documents to the query, filtered inside Chroma on the normalized
+    location and type written at ingest time.
     """
-    match = re.search(r"in (\w+)", question, re.IGNORECASE)
-    if match:
-        return match.group(1)
-    return None
-
-def retrieve_relevant_docs(query, top_k=3):
-    query_embedding = embedder.encode(query).tolist()
-    results = collection.query(
+    if query_embedding is None:
+        query_embedding = get_embedder().encode(query).tolist()
+    results = get_collection().query(
         query_embeddings=[query_embedding],
-        n_results=top_k
+        n_results=top_k,
+        where=metadata_filter(location, doc_type),
     )
     return results
 
@@ -36,109 +30,107 @@ def scrape_live_hotels(location="Paris"):
     """
     Scrape Booking.com for demonstration.
     """
-    import requests
     from bs4 import BeautifulSoup
 
-    url = f"https://www.booking.com/searchresults.html?ss={location}"
+    url = search_url(location)
     headers = {
         "User-Agent": "Mozilla/5.0"
     }
-    response = requests.get(url, headers=headers)
+    with stage("fetch", source="booking") as span:
+        response = http_get(url, headers=headers)
+        span.add("page_chars", len(response.text))
 
     if response.status_code != 200:
         print("Failed to fetch live hotel data.")
         return []
 
-    soup = BeautifulSoup(response.text, "html.parser")
-    hotels = []
-
-    for item in soup.select("div[data-testid='property-card']")[:5]:
-        name = item.select_one("div[data-testid='title']").get_text(strip=True)
-        price_tag = item.select_one("span[data-testid='price-and-discounted-price']")
-        price = price_tag.get_text(strip=True) if price_tag else "N/A"
-        rating_tag = item.select_one("div[data-testid='review-score']")
-        rating = rating_tag.get_text(strip=True) if rating_tag else "N/A"
-
-        hotels.append({
-            "type": "hotel",
-            "name": name,
-            "location": location,
-            "price_per_night": price,
-            "rating": rating,
-        })
+    with stage("parse", source="booking") as span:
+        soup = BeautifulSoup(response.text, "html.parser")
+        hotels = []
+
+        for item in soup.select("div[data-testid='property-card']")[:5]:
+            name = item.select_one("div[data-testid='title']").get_text(strip=True)
+            price_tag = item.select_one("span[data-testid='price-and-discounted-price']")
+            price = price_tag.get_text(strip=True) if price_tag else "N/A"
+            rating_tag = item.select_one("div[data-testid='review-score']")
+            rating = rating_tag.get_text(strip=True) if rating_tag else "N/A"
+
+            hotels.append({
+                "type": "hotel",
+                "name": name,
+                "location": location,
+                "price_per_night": price,
+                "rating": rating,
+            })
+        span.add("cards", len(hotels))
 
     return hotels
 
 def ask_ollama(question, context):
-    prompt = (
-        f"Using the following travel data, answer the question briefly:\n\n"
-        f"{context}\n\n"
-        f"Question: {question}\n"
-        f"Answer:"
-    )
-    try:
-        result = subprocess.run(
-            ["ollama", "run", "llama3"],
-            input=prompt,
-            capture_output=True,
-            text=True,
-            check=True,
+    with stage("prompt") as span:
+        prompt = (
+            f"Using the following travel data, answer the question briefly:\n\n"
+            f"{context}\n\n"
+            f"Question: {question}\n"
+            f"Answer:"
         )
-        return result.stdout.strip()
-    except subprocess.CalledProcessError as e:
-        print("Error calling Ollama:", e.stderr)
+        span.add("prompt_chars", len(prompt))
+    try:
+        return get_client().generate(prompt)
+    except LLMError as e:
+        print("Error calling Ollama:", e)
         return "Failed to get LLM response."
 
 def main():
     user_question = input("Ask about travel data: ")
 
     # Extract location
-    location = extract_location(user_question)
+    query = parse_query(user_question)
+    location = query.location
     if not location:
         print("❌ Could not detect a location in your question.")
         return
 
     print(f"\n✅ Detected location: {location}")
 
-    # Retrieve from Chroma
-    search_results = retrieve_relevant_docs(user_question)
-    docs = search_results["documents"][0] if search_results["documents"] else []
+    # Answer repeated or rephrased questions from the semantic cache
+    embedder = get_embedder()
+    answer_cache = get_answer_cache()
+    question_embedding = embedder.encode(user_question).tolist()
+    # Budget and rating change the answer, so they are part of the cache key
+    cache_variant = answer_variant(query.hotel_filters())
+    cached_answer = answer_cache.lookup(question_embedding, location, cache_variant)
+    if cached_answer:
+        print("\n✅ Found a cached answer for a similar question.")
+        print("\nLLM answer:")
+        print(cached_answer)
+        return
 
-    # Check if any docs mention this location
-    city_in_results = any(
-        location.lower() in (doc or "").lower()
-        for doc in docs
+    # Retrieve from Chroma
+    docs_scraped_at = None
+    search_results = retrieve_relevant_docs(
+        user_question,
+        query_embedding=question_embedding,
+        location=location,
+        doc_type="hotel",
     )
+    docs = search_results["documents"][0] if search_results["documents"] else []
 
-    if docs and city_in_results:
+    if docs:
         print("\n✅ Found relevant data in Chroma for this location.")
         context = format_docs_for_prompt(docs)
+        docs_scraped_at = oldest_scraped_at(search_results["metadatas"][0])
     else:
-        if docs:
-            print("\n⚠️ Found data in Chroma, but it does not mention this location. Scraping live...")
-        else:
-            print("\n❌ No relevant data found in Chroma. Scraping live...")
+        print("\n❌ No relevant data found in Chroma for this location. Scraping live...")
 
         hotels = scrape_live_hotels(location)
         if not hotels:
             print("❌ No hotels found for this location.")
             return
 
-        docs = []
-        for i, item in enumerate(hotels):
-            text = (
-                f"Hotel {item['name']} in {item['location']} costs {item['price_per_night']} per night with rating {item['rating']}."
-            )
-            docs.append(text)
-
-            # Optionally store in Chroma
-            embedding = embedder.encode(text).tolist()
-            collection.add(
-                ids=[f"live_{location}_{i}"],
-                documents=[text],
-                embeddings=[embedding],
-                metadatas=[item],
-            )
+        # Store in Chroma with one batched encode and upsert
+        docs = index_hotels(get_collection(), embedder, hotels, location)
+        answer_cache.invalidate(location)
 
         context = format_docs_for_prompt(docs)
 
@@ -149,5 +141,11 @@ def main():
     print("\nLLM answer:")
     print(answer)
 
+    if answer != "Failed to get LLM response.":
+        answer_cache.store(question_embedding, location, user_question, answer, docs_scraped_at, cache_variant)
+
 if __name__ == "__main__":
     main()
+    if TRACING_ENABLED:
+        print("\nStage timings:")
+        print(summary())
@@ -0,0 +1,152 @@
+"""
+Heavyweight shared resources (embedding model, Chroma, hotel tables, database
+pool), created on first use instead of at import time.
+
+Set WARM_UP to a comma-separated list of resource names (or "all") to load them
+in the background when the app starts:
+
+    WARM_UP=embedder,collection python app.py
+"""
+import atexit
+import os
+import threading
+import time
+
+CHROMA_PATH = os.getenv("CHROMA_PATH", "./chromadb_persist")
+COLLECTION_NAME = "travel_data"
+WARM_UP = os.getenv("WARM_UP", "")
+
+
+class ResourceRegistry:
+    """
+    Named factories whose results are built once, on first get(). Each resource
+    has its own lock, so a slow model load does not block other resources.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._factories = {}
+        self._closers = {}
+        self._locks = {}
+        self._instances = {}
+        self._load_seconds = {}
+
+    def register(self, name, factory, close=None):
+        with self._lock:
+            self._factories[name] = factory
+            self._locks[name] = threading.Lock()
+            if close:
+                self._closers[name] = close
+
+    def get(self, name):
+        try:
+            return self._instances[name]
+        except KeyError:
+            pass
+
+        with self._locks[name]:
+            if name not in self._instances:
+                started = time.time()
+                instance = self._factories[name]()
+                self._load_seconds[name] = time.time() - started
+                self._instances[name] = instance
+        return self._instances[name]
+
+    def loaded(self, name):
+        return name in self._instances
+
+    def warm_up(self, names=None, background=False):
+        """
+        Loads the named resources (all registered ones by default). With
+        background=True this returns immediately and loads them on a daemon thread.
+        """
+        if names is None or names == "all":
+            names = list(self._factories)
+        elif isinstance(names, str):
+            names = [name.strip() for name in names.split(",") if name.strip()]
+
+        def run():
+            for name in names:
+                try:
+                    self.get(name)
+                except Exception as e:
+                    print(f"⚠️ Warm-up of {name} failed: {e}")
+
+        if background:
+            threading.Thread(target=run, name="resource-warm-up", daemon=True).start()
+        else:
+            run()
+
+    def stats(self):
+        return {
+            name: {
+                "loaded": name in self._instances,
+                "load_seconds": self._load_seconds.get(name),
+            }
+            for name in self._factories
+        }
+
+    def close(self):
+        for name, close in self._closers.items():
+            instance = self._instances.pop(name, None)
+            if instance is not None:
+                close(instance)
+
+
+def _load_embedder():
+    from embeddingService import open_embedder
+    return open_embedder()
+
+
+def _open_chroma():
+    import chromadb
+    return chromadb.PersistentClient(path=CHROMA_PATH)
+
+
+def _open_collection():
+    return get_chroma_client().get_or_create_collection(name=COLLECTION_NAME)
+
+
+def _open_answer_cache():
+    from semanticCache import SemanticCache
+    return SemanticCache(get_chroma_client())
+
+
+def _open_hotel_store():
+    from hotelTable import HotelStore
+    return HotelStore()
+
+
+def _open_db_pool():
+    from dbPool import get_pool
+    return get_pool()
+
+
+registry = ResourceRegistry()
+registry.register("embedder", _load_embedder)
+registry.register("chroma", _open_chroma)
+registry.register("collection", _open_collection)
+registry.register("answer_cache", _open_answer_cache)
+registry.register("hotel_store", _open_hotel_store)
+registry.register("db_pool", _open_db_pool, close=lambda pool: pool.close())
+atexit.register(registry.close)
+
+
+def get_embedder():
+    return registry.get("embedder")
+
+
+def get_chroma_client():
+    return registry.get("chroma")
+
+
+def get_collection():
+    return registry.get("collection")
+
+
+def get_answer_cache():
+    return registry.get("answer_cache")
+
+
+def get_hotel_store():
+    return registry.get("hotel_store")
@@ -0,0 +1,162 @@
+import threading
+import time
+from collections import OrderedDict
+
+
+def make_key(destination, start_date=None, end_date=None, *extra):
+    """
+    Normalizes a destination and date range into a cache key, so "  new york"
+    and "New York" share an entry.
+    """
+    normalized = " ".join((destination or "").lower().split())
+    return (normalized, start_date or "", end_date or "") + tuple(extra)
+
+
+class CacheEntry:
+    def __init__(self, value):
+        self.value = value
+        self.stored_at = time.time()
+
+    def age(self):
+        return time.time() - self.stored_at
+
+
+class PendingLoad:
+    """
+    One in-flight load; callers that arrive while it runs share its outcome.
+    """
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.value = None
+        self.error = None
+
+
+class ResultCache:
+    """
+    LRU cache of scrape results with a TTL and stale-while-revalidate.
+
+    Entries younger than ttl are served as-is. Entries older than ttl but within
+    ttl + stale_ttl are still served immediately while a background thread
+    reloads them. Anything older is treated as a miss. Concurrent misses for the
+    same key wait on a single load instead of each scraping.
+    """
+
+    def __init__(self, ttl=900, stale_ttl=3600, max_entries=256, should_cache=None, name="cache"):
+        self.ttl = ttl
+        self.stale_ttl = stale_ttl
+        self.max_entries = max_entries
+        self.should_cache = should_cache or (lambda value: True)
+        self.name = name
+
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self._loading = {}
+
+        self.hits = 0
+        self.stale_hits = 0
+        self.misses = 0
+        self.refreshes = 0
+        self.evictions = 0
+
+    def _store(self, key, value):
+        if not self.should_cache(value):
+            return
+        with self._lock:
+            self._entries[key] = CacheEntry(value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def _load(self, key, loader):
+        """
+        Runs loader once per key at a time. Callers that arrive meanwhile get the
+        same result (or exception), even when it is not cacheable, so a slow
+        upstream is not hit once per waiting request; only later calls reload.
+        """
+        with self._lock:
+            pending = self._loading.get(key)
+            owner = pending is None
+            if owner:
+                pending = PendingLoad()
+                self._loading[key] = pending
+
+        if not owner:
+            pending.done.wait()
+            if pending.error is not None:
+                raise pending.error
+            return pending.value
+
+        try:
+            pending.value = loader()
+            self._store(key, pending.value)
+            return pending.value
+        except Exception as e:
+            pending.error = e
+            raise
+        finally:
+            with self._lock:
+                self._loading.pop(key, None)
+            pending.done.set()
+
+    def _refresh_in_background(self, key, loader):
+        with self._lock:
+            if key in self._loading:
+                return
+            self.refreshes += 1
+
+        def run():
+            try:
+                self._load(key, loader)
+            except Exception as e:
+                print(f"Background refresh failed for {self.name} {key}:", e)
+
+        threading.Thread(target=run, daemon=True).start()
+
+    def get_or_load(self, key, loader):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                age = entry.age()
+                if age <= self.ttl:
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    return entry.value
+                if age <= self.ttl + self.stale_ttl:
+                    self._entries.move_to_end(key)
+                    self.stale_hits += 1
+                    stale_value = entry.value
+                else:
+                    del self._entries[key]
+                    entry = None
+            if entry is None:
+                self.misses += 1
+
+        if entry is not None:
+            self._refresh_in_background(key, loader)
+            return stale_value
+        return self._load(key, loader)
+
+    def invalidate(self, key=None):
+        with self._lock:
+            if key is None:
+                self._entries.clear()
+            else:
+                self._entries.pop(key, None)
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.stale_hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "max_entries": self.max_entries,
+                "ttl_seconds": self.ttl,
+                "stale_ttl_seconds": self.stale_ttl,
+                "hits": self.hits,
+                "stale_hits": self.stale_hits,
+                "misses": self.misses,
+                "hit_ratio": (self.hits + self.stale_hits) / lookups if lookups else 0.0,
+                "background_refreshes": self.refreshes,
+                "evictions": self.evictions,
+            }
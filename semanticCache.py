@@ -0,0 +1,97 @@
+import os
+import time
+import uuid
+
+from ingest import normalize_location
+
+# Cosine similarity above which two questions about the same place share an answer
+SIMILARITY_THRESHOLD = float(os.getenv("SEMANTIC_CACHE_THRESHOLD", "0.9"))
+# Answers never outlive the scraped data they were built from by more than this
+DOC_FRESHNESS_SECONDS = float(os.getenv("SEMANTIC_CACHE_FRESHNESS", str(6 * 60 * 60)))
+
+
+def answer_variant(constraints):
+    """
+    Variant string for the constraints that change an answer (dates, budget,
+    rating), so "under $100" and "under $200" are cached apart.
+    """
+    return " ".join(f"{k}={v}" for k, v in sorted(constraints.items()) if v is not None)
+
+
+def oldest_scraped_at(metadatas):
+    """
+    Scrape time of the oldest document in a result set, or None if unknown.
+    """
+    times = [m["scraped_at"] for m in metadatas or [] if m and m.get("scraped_at")]
+    return min(times) if times else None
+
+
+class SemanticCache:
+    """
+    Caches final LLM answers keyed by question embedding.
+
+    Entries live in their own cosine-space Chroma collection, so they are shared
+    between runs of the query scripts and survive restarts. A lookup only matches
+    entries for the same normalized location, within the similarity threshold, and
+    whose source documents are still fresh.
+
+    Answers to the same place under different constraints (e.g. a budget filter)
+    are told apart by variant, and invalidate(location) drops all of them.
+    """
+
+    def __init__(self, chroma_client, name="answer_cache",
+                 threshold=SIMILARITY_THRESHOLD, freshness=DOC_FRESHNESS_SECONDS):
+        self.collection = chroma_client.get_or_create_collection(
+            name=name, metadata={"hnsw:space": "cosine"}
+        )
+        self.threshold = threshold
+        self.freshness = freshness
+        self.hits = 0
+        self.misses = 0
+
+    def lookup(self, question_embedding, location, variant=""):
+        location_key = normalize_location(location)
+        results = self.collection.query(
+            query_embeddings=[question_embedding],
+            n_results=1,
+            where={"$and": [
+                {"location_key": location_key},
+                {"variant": variant},
+                {"expires_at": {"$gt": time.time()}},
+            ]},
+        )
+        if results["ids"] and results["ids"][0]:
+            similarity = 1 - results["distances"][0][0]
+            if similarity >= self.threshold:
+                self.hits += 1
+                return results["metadatas"][0][0]["answer"]
+        self.misses += 1
+        return None
+
+    def store(self, question_embedding, location, question, answer, docs_scraped_at=None, variant=""):
+        """
+        Saves an answer. docs_scraped_at is when the oldest document in the prompt
+        was scraped; the entry expires once that data is no longer fresh.
+        """
+        scraped_at = docs_scraped_at or time.time()
+        self.collection.add(
+            ids=[uuid.uuid4().hex],
+            documents=[question],
+            embeddings=[question_embedding],
+            metadatas=[{
+                "location_key": normalize_location(location),
+                "variant": variant,
+                "answer": answer,
+                "expires_at": scraped_at + self.freshness,
+            }],
+        )
+
+    def invalidate(self, location):
+        """
+        Drops every cached answer for a location, whatever its variant, e.g.
+        after the location was scraped again.
+        """
+        self.collection.delete(where={"location_key": normalize_location(location)})
+
+    def purge_expired(self):
+        self.collection.delete(where={"expires_at": {"$lte": time.time()}})
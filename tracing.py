@@ -0,0 +1,210 @@
+"""
+Per-stage timing and counters for the scrape -> embed -> retrieve -> LLM pipeline.
+
+    with stage("fetch", source="booking") as span:
+        page = http_get(url)
+        span.add("bytes", len(page.text))
+
+    @traced("retrieve")
+    def retrieve_relevant_docs(...): ...
+
+Aggregates are exposed in Prometheus text format by render_prometheus() (served
+at /metrics by the app). TRACING=0 turns everything off: traced() returns the
+function unchanged, and stage() returns a shared no-op span.
+"""
+import os
+import threading
+import time
+from functools import wraps
+
+ENABLED = os.getenv("TRACING", "1") != "0"
+
+# Upper bounds in seconds; scrapes take seconds, encodes and queries milliseconds
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60)
+METRIC_PREFIX = "trip_planner"
+
+
+class StageStats:
+    def __init__(self):
+        self.count = 0
+        self.errors = 0
+        self.total = 0.0
+        self.buckets = [0] * len(LATENCY_BUCKETS)
+        # measure -> [sum, observations]
+        self.measures = {}
+
+
+class Tracer:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._stages = {}
+
+    def _stats(self, name, labels):
+        key = (name, labels)
+        stats = self._stages.get(key)
+        if stats is None:
+            stats = self._stages[key] = StageStats()
+        return stats
+
+    def observe(self, name, labels, seconds, measures, failed):
+        with self._lock:
+            stats = self._stats(name, labels)
+            stats.count += 1
+            stats.total += seconds
+            if failed:
+                stats.errors += 1
+            for i, bound in enumerate(LATENCY_BUCKETS):
+                if seconds <= bound:
+                    stats.buckets[i] += 1
+                    break
+            for measure, value in measures.items():
+                entry = stats.measures.setdefault(measure, [0.0, 0])
+                entry[0] += value
+                entry[1] += 1
+
+    def snapshot(self):
+        with self._lock:
+            return {
+                key: (stats.count, stats.errors, stats.total, list(stats.buckets),
+                      {m: tuple(v) for m, v in stats.measures.items()})
+                for key, stats in self._stages.items()
+            }
+
+    def reset(self):
+        with self._lock:
+            self._stages.clear()
+
+
+tracer = Tracer()
+
+
+class Span:
+    __slots__ = ("name", "labels", "measures", "started")
+
+    def __init__(self, name, labels):
+        self.name = name
+        self.labels = labels
+        self.measures = {}
+
+    def add(self, measure, value):
+        """
+        Records a count or size for this stage (cards found, docs embedded, tokens).
+        """
+        if value is not None:
+            self.measures[measure] = self.measures.get(measure, 0) + value
+
+    def __enter__(self):
+        self.started = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        tracer.observe(
+            self.name, self.labels, time.perf_counter() - self.started, self.measures, exc_type is not None
+        )
+        return False
+
+
+class NullSpan:
+    __slots__ = ()
+
+    def add(self, measure, value):
+        pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        return False
+
+
+NULL_SPAN = NullSpan()
+
+
+def stage(name, **labels):
+    """
+    Times the enclosed block as one run of the named stage.
+    """
+    if not ENABLED:
+        return NULL_SPAN
+    return Span(name, tuple(sorted(labels.items())))
+
+
+def traced(name, **labels):
+    """
+    Decorator form of stage(); a no-op when tracing is off.
+    """
+    def decorate(fn):
+        if not ENABLED:
+            return fn
+
+        @wraps(fn)
+        def wrapper(*args, **kwargs):
+            with stage(name, **labels):
+                return fn(*args, **kwargs)
+        return wrapper
+    return decorate
+
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _label_text(labels, extra=()):
+    pairs = list(labels) + list(extra)
+    if not pairs:
+        return ""
+    return "{" + ",".join(f'{key}="{_escape(value)}"' for key, value in pairs) + "}"
+
+
+def render_prometheus():
+    """
+    All stage aggregates in the Prometheus text exposition format.
+    """
+    snapshot = sorted(tracer.snapshot().items())
+    seconds = f"{METRIC_PREFIX}_stage_seconds"
+    errors = f"{METRIC_PREFIX}_stage_errors_total"
+    measure_sum = f"{METRIC_PREFIX}_stage_measure_sum"
+    measure_count = f"{METRIC_PREFIX}_stage_measure_count"
+
+    lines = [
+        f"# HELP {seconds} Time spent per pipeline stage.",
+        f"# TYPE {seconds} histogram",
+    ]
+    for (name, labels), (count, _, total, buckets, _) in snapshot:
+        base = (("stage", name),) + labels
+        cumulative = 0
+        for bound, hits in zip(LATENCY_BUCKETS, buckets):
+            cumulative += hits
+            lines.append(f"{seconds}_bucket{_label_text(base, [('le', bound)])} {cumulative}")
+        lines.append(f"{seconds}_bucket{_label_text(base, [('le', '+Inf')])} {count}")
+        lines.append(f"{seconds}_sum{_label_text(base)} {total}")
+        lines.append(f"{seconds}_count{_label_text(base)} {count}")
+
+    lines += [f"# HELP {errors} Stage runs that raised.", f"# TYPE {errors} counter"]
+    for (name, labels), (_, failed, _, _, _) in snapshot:
+        lines.append(f"{errors}{_label_text((('stage', name),) + labels)} {failed}")
+
+    for family, position, help_text in (
+        (measure_sum, 0, "Counts and sizes recorded by stages (cards, docs, tokens)."),
+        (measure_count, 1, "Number of stage runs that recorded the measure."),
+    ):
+        lines += [f"# HELP {family} {help_text}", f"# TYPE {family} counter"]
+        for (name, labels), (_, _, _, _, measures) in snapshot:
+            for measure, values in sorted(measures.items()):
+                label_text = _label_text((("stage", name),) + labels, [("measure", measure)])
+                lines.append(f"{family}{label_text} {values[position]}")
+
+    return "\n".join(lines) + "\n"
+
+
+def summary():
+    """
+    One line per stage with runs, average time and measure totals, for CLI output.
+    """
+    lines = []
+    for (name, labels), (count, failed, total, _, measures) in sorted(tracer.snapshot().items()):
+        label = name + "".join(f" {key}={value}" for key, value in labels)
+        extras = "".join(f" {measure}={value:g}" for measure, (value, _) in sorted(measures.items()))
+        errors = f" errors={failed}" if failed else ""
+        lines.append(f"{label:<32} runs={count} avg={total / count * 1000:.1f}ms{extras}{errors}")
+    return "\n".join(lines)
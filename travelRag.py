@@ -1,16 +1,13 @@
-import chromadb
-from sentence_transformers import SentenceTransformer
-import subprocess
-import re
-import requests
 from bs4 import BeautifulSoup
 
-# Initialize embedding model
-embedder = SentenceTransformer("all-MiniLM-L6-v2")
-
-# Initialize Chroma client
-chroma_client = chromadb.PersistentClient(path="./chromadb_persist")
-collection = chroma_client.get_or_create_collection(name="travel_data")
+from llmClient import get_client, LLMError
+from ingest import index_hotels, index_flights, metadata_filter
+from semanticCache import oldest_scraped_at, answer_variant
+from resources import get_embedder, get_collection, get_answer_cache, get_hotel_store
+from fixtureStore import http_get
+from hotelFetch import search_url
+from queryParser import parse_query
+from tracing import stage, traced, summary, ENABLED as TRACING_ENABLED
 
 HEADERS = {
     "User-Agent": "Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) "
@@ -18,34 +15,47 @@ HEADERS = {
 }
 
 
-def extract_locations_for_flight(question):
+def load_hotel_table(location):
     """
-    Extracts origin and destination locations from questions like:
-    'Show me flights from New York to Paris'
+    Numeric hotel table for a location, built from the Chroma metadata on first use.
     """
-    match = re.search(r"from ([A-Za-z ]+) to ([A-Za-z ]+)", question, re.IGNORECASE)
-    if match:
-        origin = match.group(1).strip()
-        destination = match.group(2).strip()
-        return origin, destination
-    return None, None
+    store = get_hotel_store()
+    table = store.get(location)
+    if table is None:
+        results = get_collection().get(
+            where=metadata_filter(location, "hotel"),
+            include=["documents", "metadatas"],
+        )
+        table = store.put(location, results["metadatas"], results["documents"])
+    return table
 
 
-def extract_location(question):
+def filtered_hotel_docs(location, filters, limit=5):
     """
-    Extracts a single location for hotel queries.
+    Texts of the hotels that pass the budget and rating filters, best first, and
+    when the oldest of them was scraped. Returns None when nothing is indexed
+    for the location yet.
     """
-    match = re.search(r"in ([A-Za-z ]+)", question, re.IGNORECASE)
-    if match:
-        return match.group(1).strip()
-    return None
+    table = load_hotel_table(location)
+    if not len(table):
+        return None
+    sort_by = "rating" if "min_rating" in filters and "max_price" not in filters else "price"
+    rows = table.select(sort_by=sort_by, limit=limit, **filters)
+    return list(table.texts[rows]), oldest_scraped_at([table.records[i] for i in rows])
 
 
-def retrieve_relevant_docs(query, top_k=3):
-    query_embedding = embedder.encode(query).tolist()
-    results = collection.query(
+@traced("retrieve")
+def retrieve_relevant_docs(query, top_k=3, query_embedding=None, location=None, doc_type=None):
+    """
+    Nearest documents to the query, filtered inside Chroma on the normalized
+    location and type written at ingest time.
+    """
+    if query_embedding is None:
+        query_embedding = get_embedder().encode(query).tolist()
+    results = get_collection().query(
         query_embeddings=[query_embedding],
-        n_results=top_k
+        n_results=top_k,
+        where=metadata_filter(location, doc_type),
     )
     return results
 
@@ -55,160 +65,192 @@ def format_docs_for_prompt(docs):
 
 
 def scrape_hotels(location):
-    url = f"https://www.booking.com/searchresults.html?ss={location}"
-    response = requests.get(url, headers=HEADERS)
+    url = search_url(location)
+    with stage("fetch", source="booking") as span:
+        response = http_get(url, headers=HEADERS)
+        span.add("page_chars", len(response.text))
 
     if response.status_code != 200:
         print("❌ Could not fetch hotel data.")
         return []
 
-    soup = BeautifulSoup(response.text, "html.parser")
-    hotels = []
-    for item in soup.select("div[data-testid='property-card']")[:5]:
-        name = item.select_one("div[data-testid='title']").get_text(strip=True)
-        price_tag = item.select_one("span[data-testid='price-and-discounted-price']")
-        price = price_tag.get_text(strip=True) if price_tag else "N/A"
-        rating_tag = item.select_one("div[data-testid='review-score']")
-        rating = rating_tag.get_text(strip=True) if rating_tag else "N/A"
-
-        hotels.append({
-            "type": "hotel",
-            "name": name,
-            "location": location,
-            "price_per_night": price,
-            "rating": rating,
-        })
+    with stage("parse", source="booking") as span:
+        soup = BeautifulSoup(response.text, "html.parser")
+        hotels = []
+        for item in soup.select("div[data-testid='property-card']")[:5]:
+            name = item.select_one("div[data-testid='title']").get_text(strip=True)
+            price_tag = item.select_one("span[data-testid='price-and-discounted-price']")
+            price = price_tag.get_text(strip=True) if price_tag else "N/A"
+            rating_tag = item.select_one("div[data-testid='review-score']")
+            rating = rating_tag.get_text(strip=True) if rating_tag else "N/A"
+
+            hotels.append({
+                "type": "hotel",
+                "name": name,
+                "location": location,
+                "price_per_night": price,
+                "rating": rating,
+            })
+        span.add("cards", len(hotels))
     return hotels
 
 
-def scrape_flights(origin, destination):
+def scrape_flights(origin, destination, date="2025-07-10", origin_code=None, destination_code=None):
     """
     Simulates scraping flights from Kayak (pseudo-selectors—adjust for real scraping).
+    Airport codes are used in the URL when known.
     """
-    url = f"https://www.kayak.com/flights/{origin}-{destination}/2025-07-10"
-    response = requests.get(url, headers=HEADERS)
+    url = f"https://www.kayak.com/flights/{origin_code or origin}-{destination_code or destination}/{date}"
+    with stage("fetch", source="kayak") as span:
+        response = http_get(url, headers=HEADERS)
+        span.add("page_chars", len(response.text))
 
     if response.status_code != 200:
         print("❌ Could not fetch flight data.")
         return []
 
-    soup = BeautifulSoup(response.text, "html.parser")
-    flights = []
-    for item in soup.select("div.resultWrapper")[:5]:
-        airline = item.select_one(".codeshares-airline-names").get_text(strip=True)
-        price = item.select_one(".price-text").get_text(strip=True)
-        time = item.select_one(".section-times").get_text(strip=True)
-
-        flights.append({
-            "type": "flight",
-            "airline": airline,
-            "route": f"{origin} to {destination}",
-            "date": "2025-07-10",
-            "price": price,
-            "time": time,
-        })
+    with stage("parse", source="kayak") as span:
+        soup = BeautifulSoup(response.text, "html.parser")
+        flights = []
+        for item in soup.select("div.resultWrapper")[:5]:
+            airline = item.select_one(".codeshares-airline-names").get_text(strip=True)
+            price = item.select_one(".price-text").get_text(strip=True)
+            time = item.select_one(".section-times").get_text(strip=True)
+
+            flights.append({
+                "type": "flight",
+                "airline": airline,
+                "route": f"{origin} to {destination}",
+                "date": date,
+                "price": price,
+                "time": time,
+            })
+        span.add("cards", len(flights))
     return flights
 
 
 def ask_ollama(question, context):
-    prompt = (
-        f"Using the following travel data, answer the question briefly:\n\n"
-        f"{context}\n\n"
-        f"Question: {question}\n"
-        f"Answer:"
-    )
-    try:
-        result = subprocess.run(
-            ["ollama", "run", "llama3"],
-            input=prompt,
-            capture_output=True,
-            text=True,
-            check=True,
+    with stage("prompt") as span:
+        prompt = (
+            f"Using the following travel data, answer the question briefly:\n\n"
+            f"{context}\n\n"
+            f"Question: {question}\n"
+            f"Answer:"
         )
-        return result.stdout.strip()
-    except subprocess.CalledProcessError as e:
-        print("❌ Error calling Ollama:", e.stderr)
+        span.add("prompt_chars", len(prompt))
+    try:
+        return get_client().generate(prompt)
+    except LLMError as e:
+        print("❌ Error calling Ollama:", e)
         return "Failed to get LLM response."
 
 
 def main():
     user_question = input("Ask about travel data: ")
+    embedder = get_embedder()
+    answer_cache = get_answer_cache()
+    question_embedding = embedder.encode(user_question).tolist()
+    docs_scraped_at = None
+
+    # Origin, destination, dates, budget and rating in one pass
+    query = parse_query(user_question)
 
     # Check if it's about flights
-    origin, destination = extract_locations_for_flight(user_question)
-    if origin and destination:
+    origin, destination = query.origin, query.destination
+    if origin and destination and query.intent == "flight":
         print(f"✅ Detected flight query: from {origin} to {destination}")
+        start_date = query.start_date or "2025-07-10"
+        cache_location = f"{origin} to {destination}"
+        cache_variant = answer_variant({"start_date": start_date, "end_date": query.end_date})
+
+        cached_answer = answer_cache.lookup(question_embedding, cache_location, cache_variant)
+        if cached_answer:
+            print("\n✅ Found a cached answer for a similar question.")
+            print("\nLLM answer:")
+            print(cached_answer)
+            return
 
-        flights = scrape_flights(origin, destination)
+        flights = scrape_flights(
+            origin,
+            destination,
+            start_date,
+            query.origin_code,
+            query.destination_code,
+        )
         if not flights:
             print("❌ No flights found for this route.")
             return
 
-        docs = []
-        for i, item in enumerate(flights):
-            text = (
-                f"Flight by {item['airline']} from {item['route']} on {item['date']} "
-                f"departing at {item['time']} priced at {item['price']}."
-            )
-            docs.append(text)
-
-            embedding = embedder.encode(text).tolist()
-            collection.add(
-                ids=[f"flight_{origin}_{destination}_{i}"],
-                documents=[text],
-                embeddings=[embedding],
-                metadatas=[item],
-            )
+        docs = index_flights(
+            get_collection(), embedder, flights, origin, destination
+        )
+        answer_cache.invalidate(cache_location)
 
         context = format_docs_for_prompt(docs)
 
     else:
         # Otherwise, assume it's about hotels
-        location = extract_location(user_question)
+        location = query.location
         if not location:
             print("❌ Could not detect a location in your question.")
             return
         print(f"✅ Detected hotel location: {location}")
+        # Budget and rating constraints are applied to the numeric columns, so only
+        # qualifying hotels reach the prompt. Filtered answers are cached separately.
+        filters = query.hotel_filters()
+        cache_location = location
+        cache_variant = answer_variant(filters)
+
+        cached_answer = answer_cache.lookup(question_embedding, cache_location, cache_variant)
+        if cached_answer:
+            print("\n✅ Found a cached answer for a similar question.")
+            print("\nLLM answer:")
+            print(cached_answer)
+            return
 
-        search_results = retrieve_relevant_docs(user_question)
-        docs = search_results["documents"][0] if search_results["documents"] else []
-
-        city_in_results = any(
-            location.lower() in (doc or "").lower()
-            for doc in docs
-        )
-
-        if docs and city_in_results:
-            print("\n✅ Found relevant data in Chroma for this location.")
+        if filters:
+            selected = filtered_hotel_docs(location, filters)
+            if selected is None:
+                print("\n❌ No hotels indexed for this location. Scraping live...")
+                hotels = scrape_hotels(location)
+                if hotels:
+                    index_hotels(get_collection(), embedder, hotels, location)
+                    get_hotel_store().invalidate(location)
+                    answer_cache.invalidate(location)
+                selected = filtered_hotel_docs(location, filters) or ([], None)
+            docs, docs_scraped_at = selected
+            if not docs:
+                print(f"❌ No hotels in {location} match {filters}.")
+                return
+            print(f"\n✅ {len(docs)} hotels match {filters}.")
             context = format_docs_for_prompt(docs)
+
         else:
+            search_results = retrieve_relevant_docs(
+                user_question,
+                query_embedding=question_embedding,
+                location=location,
+                doc_type="hotel",
+            )
+            docs = search_results["documents"][0] if search_results["documents"] else []
+
             if docs:
-                print("\n⚠️ Found data in Chroma, but it does not mention this location. Scraping live...")
+                print("\n✅ Found relevant data in Chroma for this location.")
+                context = format_docs_for_prompt(docs)
+                docs_scraped_at = oldest_scraped_at(search_results["metadatas"][0])
             else:
-                print("\n❌ No relevant data found in Chroma. Scraping live...")
+                print("\n❌ No relevant data found in Chroma for this location. Scraping live...")
 
-            hotels = scrape_hotels(location)
-            if not hotels:
-                print("❌ No hotels found for this location.")
-                return
+                hotels = scrape_hotels(location)
+                if not hotels:
+                    print("❌ No hotels found for this location.")
+                    return
 
-            docs = []
-            for i, item in enumerate(hotels):
-                text = (
-                    f"Hotel {item['name']} in {item['location']} costs {item['price_per_night']} "
-                    f"per night with rating {item['rating']}."
-                )
-                docs.append(text)
-
-                embedding = embedder.encode(text).tolist()
-                collection.add(
-                    ids=[f"hotel_{location}_{i}"],
-                    documents=[text],
-                    embeddings=[embedding],
-                    metadatas=[item],
-                )
+                docs = index_hotels(get_collection(), embedder, hotels, location)
+                get_hotel_store().invalidate(location)
+                answer_cache.invalidate(cache_location)
 
-            context = format_docs_for_prompt(docs)
+                context = format_docs_for_prompt(docs)
 
     print("\nContext to send to LLM:\n")
     print(context)
@@ -217,6 +259,14 @@ def main():
     print("\nLLM answer:")
     print(answer)
 
+    if answer != "Failed to get LLM response.":
+        answer_cache.store(
+            question_embedding, cache_location, user_question, answer, docs_scraped_at, cache_variant
+        )
+
 
 if __name__ == "__main__":
     main()
+    if TRACING_ENABLED:
+        print("\nStage timings:")
+        print(summary())
@@ -0,0 +1,256 @@
+"""
+Writes to the trip_requests table, one at a time or in bulk, and the durable
+store behind /api/trip (PostgreSQL, or a local SQLite file when TRIP_STORE=sqlite).
+"""
+import json
+import os
+import sqlite3
+import threading
+from datetime import date
+
+import psycopg2
+from psycopg2.extras import execute_values
+
+TRIP_FIELDS = ("name", "destination", "start_date", "end_date", "budget")
+BULK_BATCH_SIZE = 500
+# Per-row errors beyond this are counted but not returned
+MAX_REPORTED_ERRORS = 1000
+
+# Backend for trips saved through /api/trip: "postgres", or "sqlite" for a single-host setup
+TRIP_STORE = os.getenv("TRIP_STORE", "postgres")
+SQLITE_PATH = os.getenv("TRIP_SQLITE_PATH", "trips.sqlite3")
+PLANNED_TRIP_FIELDS = ("name", "origin", "destination", "start_date", "end_date", "budget")
+
+INSERT_SQL = """
+    INSERT INTO trip_requests (name, destination, start_date, end_date, budget)
+    VALUES %s
+"""
+
+
+class TripValidationError(ValueError):
+    pass
+
+
+def _parse_date(value, field):
+    if value in (None, ""):
+        return None
+    try:
+        return date.fromisoformat(str(value))
+    except ValueError:
+        raise TripValidationError(f"{field} must be a YYYY-MM-DD date")
+
+
+def validate_trip(row):
+    """
+    Checks one submitted trip and returns it as a tuple in TRIP_FIELDS order.
+    """
+    if not isinstance(row, dict):
+        raise TripValidationError("Trip must be a JSON object")
+
+    name = row.get("name")
+    destination = row.get("destination")
+    if not name or not isinstance(name, str) or not name.strip():
+        raise TripValidationError("name is required")
+    if not destination or not isinstance(destination, str) or not destination.strip():
+        raise TripValidationError("destination is required")
+
+    start_date = _parse_date(row.get("start_date"), "start_date")
+    end_date = _parse_date(row.get("end_date"), "end_date")
+    if start_date and end_date and end_date < start_date:
+        raise TripValidationError("end_date is before start_date")
+
+    budget = row.get("budget")
+    if budget not in (None, ""):
+        try:
+            float(str(budget).replace(",", "").lstrip("$"))
+        except ValueError:
+            raise TripValidationError("budget must be a number")
+    else:
+        budget = None
+
+    return (name.strip(), destination.strip(), start_date, end_date, budget)
+
+
+def insert_trip(pool, name, destination, start_date, end_date, budget):
+    with pool.connection() as conn:
+        with conn.cursor() as cur:
+            execute_values(cur, INSERT_SQL, [(name, destination, start_date, end_date, budget)])
+
+
+class BulkResult:
+    def __init__(self):
+        self.received = 0
+        self.inserted = 0
+        self.error_count = 0
+        self.errors = []
+
+    def add_error(self, index, message):
+        self.error_count += 1
+        if len(self.errors) < MAX_REPORTED_ERRORS:
+            self.errors.append({"row": index, "error": message})
+
+    def to_dict(self):
+        return {
+            "success": self.error_count == 0,
+            "received": self.received,
+            "inserted": self.inserted,
+            "failed": self.error_count,
+            "errors": self.errors,
+        }
+
+
+def _write_batch(pool, batch, result):
+    """
+    Writes a batch of (index, values) in one transaction. If the database rejects
+    it, the batch is retried row by row behind savepoints so only the bad rows fail.
+    """
+    if not batch:
+        return
+    try:
+        with pool.connection() as conn:
+            with conn.cursor() as cur:
+                execute_values(cur, INSERT_SQL, [values for _, values in batch], page_size=len(batch))
+        result.inserted += len(batch)
+        return
+    except (psycopg2.DataError, psycopg2.IntegrityError, psycopg2.ProgrammingError):
+        pass
+
+    with pool.connection() as conn:
+        with conn.cursor() as cur:
+            for index, values in batch:
+                cur.execute("SAVEPOINT trip_row")
+                try:
+                    execute_values(cur, INSERT_SQL, [values])
+                    cur.execute("RELEASE SAVEPOINT trip_row")
+                    result.inserted += 1
+                except psycopg2.Error as e:
+                    cur.execute("ROLLBACK TO SAVEPOINT trip_row")
+                    result.add_error(index, e.pgerror or str(e))
+
+
+def bulk_insert_trips(pool, rows, batch_size=BULK_BATCH_SIZE):
+    """
+    Validates and inserts an iterable of trip dicts (or parse errors, given as
+    exceptions) in batched transactions. Invalid rows are reported, not fatal.
+    """
+    result = BulkResult()
+    batch = []
+    for index, row in enumerate(rows):
+        result.received += 1
+        try:
+            if isinstance(row, Exception):
+                raise row
+            batch.append((index, validate_trip(row)))
+        except (TripValidationError, ValueError) as e:
+            result.add_error(index, str(e))
+            continue
+
+        if len(batch) >= batch_size:
+            _write_batch(pool, batch, result)
+            batch = []
+
+    _write_batch(pool, batch, result)
+    return result
+
+
+def iter_ndjson(lines):
+    """
+    Yields one dict per non-empty NDJSON line, or the ValueError for a bad line,
+    so a single malformed line does not abort the upload.
+    """
+    for line in lines:
+        if isinstance(line, bytes):
+            line = line.decode("utf-8", errors="replace")
+        line = line.strip()
+        if not line:
+            continue
+        try:
+            yield json.loads(line)
+        except ValueError as e:
+            yield ValueError(f"Invalid JSON: {e}")
+
+
+class PostgresTripStore:
+    """
+    The pool is looked up on every call, so a database that was down when the
+    worker started is retried on the next save instead of being given up on.
+    """
+
+    backend = "postgres"
+
+    def __init__(self, get_pool):
+        self.get_pool = get_pool
+
+    def save(self, trip):
+        with self.get_pool().connection() as conn:
+            with conn.cursor() as cur:
+                cur.execute(
+                    """
+                    INSERT INTO trip_requests (name, origin, destination, start_date, end_date, budget)
+                    VALUES (%s, %s, %s, %s, %s, %s)
+                    """,
+                    _trip_values(trip),
+                )
+
+
+class SqliteTripStore:
+    """
+    Single-file fallback for running without PostgreSQL. Workers on the same host
+    share it; SQLite serializes the writes.
+    """
+
+    backend = "sqlite"
+
+    def __init__(self, path=SQLITE_PATH):
+        self.path = path
+        self._local = threading.local()
+        with self._connect() as conn:
+            conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS trip_requests (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    name TEXT,
+                    origin TEXT,
+                    destination TEXT NOT NULL,
+                    start_date TEXT,
+                    end_date TEXT,
+                    budget TEXT,
+                    created_at TEXT NOT NULL DEFAULT CURRENT_TIMESTAMP
+                )
+                """
+            )
+
+    def _connect(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=10)
+            conn.execute("PRAGMA journal_mode=WAL")
+            self._local.conn = conn
+        return conn
+
+    def save(self, trip):
+        values = tuple(None if value is None else str(value) for value in _trip_values(trip))
+        with self._connect() as conn:
+            conn.execute(
+                """
+                INSERT INTO trip_requests (name, origin, destination, start_date, end_date, budget)
+                VALUES (?, ?, ?, ?, ?, ?)
+                """,
+                values,
+            )
+
+
+def _trip_values(trip):
+    return tuple(trip.get(field) or None for field in PLANNED_TRIP_FIELDS)
+
+
+def open_trip_store(get_pool):
+    """
+    PostgreSQL store unless TRIP_STORE=sqlite. There is no automatic fallback:
+    a worker that silently switched to a local file during a database outage
+    would keep its trips apart from every other worker's, so PostgreSQL errors
+    are raised to the caller instead.
+    """
+    if TRIP_STORE == "sqlite":
+        return SqliteTripStore()
+    return PostgresTripStore(get_pool)
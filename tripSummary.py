@@ -1,47 +1,166 @@
-import subprocess
-import psycopg2
+import argparse
+import csv
+import sys
+
+from llmClient import get_client, LLMError
+from dbPool import get_pool
+
+# Destinations beyond this are folded into a single "more" line of the digest
+MAX_DIGEST_DESTINATIONS = 20
+PAGE_SIZE = 500
+
+# Budgets are free-form ("$1,200", "approx. 1200.", "1,200-1,500"), so take the
+# first number, drop its thousands separators and cast only that. The match is
+# always a valid numeric, so one odd row cannot abort the whole digest query.
+BUDGET_SQL = (
+    "replace(substring(budget::text from '[0-9][0-9,]*(?:[.][0-9]+)?'), ',', '')::numeric"
+)
+
+TRIP_COLUMNS = "id, name, destination, start_date, end_date, budget"
+
+
+def iter_trips(name, page_size=PAGE_SIZE):
+    """
+    Streams a traveller's trips with a server-side cursor, page_size rows per round trip.
+    """
+    with get_pool().connection() as conn:
+        try:
+            with conn.cursor(name="trip_summary_rows") as cur:
+                cur.itersize = page_size
+                cur.execute(
+                    f"SELECT {TRIP_COLUMNS} FROM trip_requests WHERE name = %s ORDER BY start_date, id",
+                    (name,),
+                )
+                for row in cur:
+                    yield row
+        finally:
+            # Also runs when the caller stops early (GeneratorExit skips the pool's
+            # rollback), so the connection never goes back mid-transaction
+            if not conn.closed:
+                conn.rollback()
+
+
+def get_trips_page(name, limit=50, after=None):
+    """
+    One page of trips ordered by (start_date, id). Pass the (start_date, id) of the
+    last row as after to get the next page. Trips without a start date come last.
+    Returns (rows, next_after); next_after is None on the last page.
+    """
+    params = [name]
+    where = "name = %s"
+    if after is not None:
+        after_start, after_id = after
+        if after_start is None:
+            where += " AND start_date IS NULL AND id > %s"
+            params.append(after_id)
+        else:
+            where += " AND (start_date > %s OR (start_date = %s AND id > %s) OR start_date IS NULL)"
+            params.extend([after_start, after_start, after_id])
+    params.append(limit)
+
+    with get_pool().connection() as conn:
+        with conn.cursor() as cur:
+            cur.execute(
+                f"SELECT {TRIP_COLUMNS} FROM trip_requests WHERE {where} "
+                "ORDER BY start_date, id LIMIT %s",
+                params,
+            )
+            rows = cur.fetchall()
+
+    next_after = (rows[-1][3], rows[-1][0]) if len(rows) == limit else None
+    return rows, next_after
+
+
+def get_trip_digest(name, max_destinations=MAX_DIGEST_DESTINATIONS):
+    """
+    Aggregates a traveller's trips in SQL: overall totals plus counts, date range
+    and budget per destination. Returns (totals, destinations).
+    """
+    with get_pool().connection() as conn:
+        with conn.cursor() as cur:
+            cur.execute(
+                f"""
+                SELECT COUNT(*), COUNT(DISTINCT destination), MIN(start_date), MAX(end_date),
+                       SUM({BUDGET_SQL})
+                FROM trip_requests
+                WHERE name = %s
+                """,
+                (name,),
+            )
+            totals = cur.fetchone()
+            cur.execute(
+                f"""
+                SELECT destination, COUNT(*), MIN(start_date), MAX(end_date), SUM({BUDGET_SQL})
+                FROM trip_requests
+                WHERE name = %s
+                GROUP BY destination
+                ORDER BY COUNT(*) DESC, destination
+                LIMIT %s
+                """,
+                (name, max_destinations),
+            )
+            destinations = cur.fetchall()
+    return totals, destinations
+
+
+def format_budget(value):
+    return f"{value:,.2f}" if value is not None else "unknown"
+
 
 def get_trip_summary_from_db(name):
     try:
-        conn = psycopg2.connect("postgresql://localhost")
-        cur = conn.cursor()
-        cur.execute("SELECT name, destination, start_date, end_date, budget FROM trip_requests WHERE name = %s", (name,))
-        rows = cur.fetchall()
-        cur.close()
-        conn.close()
-
-        if not rows:
+        totals, destinations = get_trip_digest(name)
+        trip_count, destination_count, first_start, last_end, total_budget = totals
+
+        if not trip_count:
             return "No trips found for that user."
 
-        summaries = []
-        for r in rows:
-            summaries.append(f"{r[0]} has a trip to {r[1]} from {r[2]} to {r[3]} with a budget of {r[4]}")
-        return "\n".join(summaries)
+        lines = [
+            f"{name} has {trip_count} trips to {destination_count} destinations "
+            f"between {first_start} and {last_end} with a total budget of {format_budget(total_budget)}."
+        ]
+        for destination, count, start, end, budget in destinations:
+            lines.append(
+                f"- {destination}: {count} trips from {start} to {end}, budget {format_budget(budget)}"
+            )
+        if destination_count > len(destinations):
+            lines.append(f"- and {destination_count - len(destinations)} more destinations")
+        return "\n".join(lines)
 
     except Exception as e:
         return f"Database error: {e}"
 
 def get_llm_response(prompt):
     try:
-        # Run ollama CLI with echo piped to stdin, no --prompt flag
-        process = subprocess.Popen(
-            ['ollama', 'run', 'llama3'],
-            stdin=subprocess.PIPE,
-            stdout=subprocess.PIPE,
-            stderr=subprocess.PIPE,
-            text=True
-        )
-        stdout, stderr = process.communicate(prompt)
-
-        if process.returncode != 0:
-            return f"Error calling Ollama: {stderr.strip()}"
-        return stdout.strip()
+        return get_client().generate(prompt)
+    except LLMError as e:
+        return f"Error calling Ollama: {e}"
+
+def export_trips(name, out=sys.stdout):
+    """
+    Writes every trip of a traveller as CSV, streaming rows from the database.
+    """
+    writer = csv.writer(out)
+    writer.writerow(TRIP_COLUMNS.split(", "))
+    count = 0
+    for row in iter_trips(name):
+        writer.writerow(row)
+        count += 1
+    return count
 
-    except Exception as e:
-        return f"Error running Ollama CLI: {e}"
 
 def main():
-    user_name = input("Enter user name: ")
+    parser = argparse.ArgumentParser(description="Summarize or export a traveller's trips")
+    parser.add_argument("name", nargs="?", help="Traveller name (prompted for when omitted)")
+    parser.add_argument("--csv", action="store_true", help="Write all trips as CSV instead of summarizing")
+    args = parser.parse_args()
+
+    user_name = args.name or input("Enter user name: ")
+    if args.csv:
+        count = export_trips(user_name)
+        print(f"✅ Exported {count} trips", file=sys.stderr)
+        return
+
     db_summary = get_trip_summary_from_db(user_name)
     if "No trips found" in db_summary or "Database error" in db_summary:
         print(db_summary)